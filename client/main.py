@@ -1,12 +1,18 @@
 import asyncio
+import os
 import sys
+import time
 from typing import Optional
 from contextlib import AsyncExitStack
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import stdio_client, get_default_environment
 
-from anthropic import Anthropic
+# Span tracing is shared with the server, which lives next to the client in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+from tracing import Tracer, current, format_traceparent
+
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
 load_dotenv()  # load environment variables from .env
@@ -16,8 +22,18 @@ class MCPClient:
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        self.anthropic = AsyncAnthropic()
         self.file = None
+        # One trace per question, continued by the server (off unless TM_TRACE_FILE is set)
+        self.tracer = Tracer(os.getenv("TM_TRACE_FILE"), service="client")
+        # Tool calls of one assistant turn run concurrently, at most this many at a time
+        self.tool_concurrency = int(os.getenv("TM_CLIENT_TOOL_CONCURRENCY", 4))
+        # Tool catalog in Claude's format, listed once per session and dropped when the server's tool list changes
+        self.tools = None
+        # Input tokens read from / written to the prompt cache, uncached input and output tokens, per session
+        self.token_usage = {"cache_read_input_tokens": 0, "cache_creation_input_tokens": 0, "input_tokens": 0, "output_tokens": 0}
+        # Latency of every turn (one Claude response plus its tool calls): time to first token, full response, turn
+        self.turn_timings = []
     # methods will go here
 
     def assign_file(self):
@@ -42,22 +58,56 @@ class MCPClient:
             raise ValueError("Server script must be a .py or .js file")
 
         command = "python" if is_python else "node"
+        # Pass the server's TM_* settings (e.g. TM_TRACE_FILE) through to it
+        env = {**get_default_environment(), **{k: v for k, v in os.environ.items() if k.startswith("TM_")}}
         server_params = StdioServerParameters(
             command=command,
             args=[server_script_path],
-            env=None
+            env=env
         )
 
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self._handle_message)
+        )
 
         await self.session.initialize()
 
         # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        self.print_u("\nConnected to server with tools:", [tool.name for tool in tools])
+        tools = await self.get_tools()
+        self.print_u("\nConnected to server with tools:", [tool["name"] for tool in tools])
+
+    async def _handle_message(self, message) -> None:
+        """Drop the cached tool catalog when the server says its tool list changed"""
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            self.tools = None
+
+    async def get_tools(self) -> list:
+        """The server's tools in Claude's format, listed once per session
+
+        The last tool carries a cache_control breakpoint, so the system prompt and the tool
+        definitions are read from the prompt cache on every call after the first.
+        """
+        if self.tools is None:
+            with self.tracer.span("list_tools"):
+                response = await self.session.list_tools()
+            tools = [{
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": tool.inputSchema
+            } for tool in response.tools]
+            if tools:
+                tools[-1]["cache_control"] = {"type": "ephemeral"}
+            self.tools = tools
+        return self.tools
+
+    def _record_usage(self, usage, span) -> None:
+        """Add a response's token counts to the session totals and its llm_call span"""
+        counts = {name: getattr(usage, name, None) or 0 for name in self.token_usage}
+        for name, count in counts.items():
+            self.token_usage[name] += count
+        span.update(counts)
 
     def _check_if_message_is_termination(self, response) -> bool:
         """Check if the response is termination is a termination message"""
@@ -79,20 +129,99 @@ class MCPClient:
                 final_text += content.text
         return final_text.replace("STOP:", "").strip()
 
+    async def call_tool(self, tool_name: str, tool_args: dict, parent=None) -> types.CallToolResult:
+        """Call a tool on the server, passing its span (a child of `parent` or of the current span) as traceparent in the request's _meta"""
+        with self.tracer.span(f"call_tool {tool_name}", parent=parent, tool=tool_name):
+            meta = {"traceparent": format_traceparent(current())} if self.tracer.path else None
+            return await self.session.send_request(
+                types.ClientRequest(
+                    types.CallToolRequest(
+                        method="tools/call",
+                        params=types.CallToolRequestParams(name=tool_name, arguments=tool_args, _meta=meta),
+                    )
+                ),
+                types.CallToolResult,
+            )
+
+    async def _tool_result(self, tool_use, semaphore: asyncio.Semaphore, parent=None) -> dict:
+        """Run one tool_use block and turn its outcome into a tool_result block, errors included as is_error results"""
+        async with semaphore:
+            try:
+                result = await self.call_tool(tool_use.name, tool_use.input, parent)
+            except Exception as e:
+                return {"type": "tool_result", "tool_use_id": tool_use.id, "content": f"Error: {e}", "is_error": True}
+        return {"type": "tool_result", "tool_use_id": tool_use.id, "content": result.content, "is_error": result.isError}
+
+    async def run_turn(self, system: list, messages: list, tools: list, iteration: int):
+        """Stream one Claude response and run its tool calls
+
+        Each tool_use block is dispatched as soon as it has finished streaming, so tool calls
+        overlap with the rest of the response and with each other (at most tool_concurrency at a time).
+
+        Returns:
+            the complete response and its tool_result blocks, in the order of the tool_use blocks
+        """
+        with self.tracer.span("turn", iteration=iteration) as turn:
+            parent = current()
+            semaphore = asyncio.Semaphore(self.tool_concurrency)
+            tasks = []
+            started = time.perf_counter()
+            first_token = None
+            try:
+                with self.tracer.span("llm_call", iteration=iteration) as span:
+                    async with self.anthropic.messages.stream(
+                        model="claude-3-5-sonnet-20241022",
+                        max_tokens=1000,
+                        system=system,
+                        messages=messages,
+                        tools=tools
+                    ) as stream:
+                        async for event in stream:
+                            if first_token is None and event.type == "content_block_delta":
+                                first_token = time.perf_counter() - started
+                            elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                                tasks.append(asyncio.create_task(self._tool_result(event.content_block, semaphore, parent)))
+                        response = await stream.get_final_message()
+                    self._record_usage(response.usage, span)
+                    span.update(ttft_s=first_token)
+                response_time = time.perf_counter() - started
+                tool_results = list(await asyncio.gather(*tasks))
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            timings = {
+                "iteration": iteration,
+                "ttft_s": None if first_token is None else round(first_token, 3),
+                "response_s": round(response_time, 3),
+                "turn_s": round(time.perf_counter() - started, 3),
+                "tool_calls": len(tasks),
+            }
+            turn.update(timings)
+        self.turn_timings.append(timings)
+        self.print_u("\nTurn timings:", timings)
+        return response, tool_results
+
     async def process_query(self, query: str) -> str:
         """Process a query using Claude and available tools"""
-        response = await self.session.list_tools()
-        available_tools = [{
-            "name": tool.name,
-            "description": tool.description,
-            "input_schema": tool.inputSchema
-        } for tool in response.tools]
+        before = dict(self.token_usage)
+        with self.tracer.span("question", question=query[:200]) as span:
+            final_text = await self._process_query(query)
+            used = {name: self.token_usage[name] - before[name] for name in before}
+            span.update(used)
+        self.print_u("\nTokens used:", used)
+        return final_text
+
+    async def _process_query(self, query: str) -> str:
+        available_tools = await self.get_tools()
 
         system_message = '''You are a helpful data analysis tool that can call tools and respond to user queries.
                     Some user queries may require multiple tool calls in sequence.
                     You can decide to a) call a tool, b) 'CONTINUE' the conversation or c) 'STOP' the conversation and provide a final answer to the user.
                     Add `CONTINUE: ` or `STOP: ` as text at the beginning of the response to indicate your choice.
                 '''
+        # Same text on every call: cached together with the tools that precede it
+        system = [{"type": "text", "text": system_message, "cache_control": {"type": "ephemeral"}}]
 
         messages = [
             {
@@ -105,44 +234,27 @@ class MCPClient:
         num_of_calls = 0
         while not self._check_if_message_is_termination(response) and num_of_calls < 10:
             self.print_u("\nSending query to Claude...")
-            response = self.anthropic.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1000,
-                system=system_message,
-                messages=messages,
-                tools=available_tools
-            )
+            response, tool_results = await self.run_turn(system, messages, available_tools, num_of_calls)
             num_of_calls += 1
             self.print_u("\nResponse received from Claude:")
             for content in response.content:
-                if content.type == 'text':
-                    self.print_u(content)
-                    messages.append({
-                        "role": "assistant",
-                        "content": content.text
-                    })
-                elif content.type == 'tool_use':
-                    self.print_u(content)
-                    tool_name = content.name
-                    tool_args = content.input
-
-                    # Execute tool call
-                    result = await self.session.call_tool(tool_name, tool_args)
-                    messages.append({
-                        "role": "assistant",
-                        "content": [content]
-                    })
-                    messages.append({
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": content.id,
-                                "content": result.content
-                            }
-                        ]
-                    })        
-        
+                self.print_u(content)
+            # The whole response is one assistant turn, answered by one user turn with all tool results
+            messages.append({
+                "role": "assistant",
+                "content": response.content
+            })
+            if tool_results:
+                messages.append({
+                    "role": "user",
+                    "content": tool_results
+                })
+            elif not self._check_if_message_is_termination(response):
+                messages.append({
+                    "role": "user",
+                    "content": "CONTINUE"
+                })
+
         final_text = self._extract_final_text(response)
         return final_text
 
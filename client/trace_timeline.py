@@ -0,0 +1,99 @@
+"""
+Render the spans of one question as a text timeline.
+
+Spans come from the JSONL files written by the client, the server and its R workers
+(TM_TRACE_FILE; point them all at the same file or pass several files). Every span is drawn
+as a bar on a common time axis, indented under its parent. Spans on the critical path (the
+chain of work the question actually waited for) are marked with `*`.
+
+Usage:
+    python trace_timeline.py traces.jsonl                # the latest question
+    python trace_timeline.py traces.jsonl --list         # all questions
+    python trace_timeline.py traces.jsonl --trace <id>   # one question by trace id
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_spans(paths):
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+
+def critical_path(span, children):
+    """
+    Walk back from the end of `span`: the child that finished last is on the critical path,
+    then the child that finished last before that one started, and so on, recursively.
+    """
+    path = {span["span_id"]}
+    cursor = span["end"]
+    for child in sorted(children[span["span_id"]], key=lambda s: s["end"], reverse=True):
+        if child["end"] <= cursor + 1e-6:
+            path |= critical_path(child, children)
+            cursor = child["start"]
+    return path
+
+
+def render(spans, width=60):
+    ids = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    children = defaultdict(list)
+    for span in spans:
+        if span["parent_id"] in ids:
+            children[span["parent_id"]].append(span)
+    start = min(s["start"] for s in spans)
+    total = max(s["end"] for s in spans) - start or 1e-9
+    critical = set()
+    for root in roots:
+        critical |= critical_path(root, children)
+
+    lines = [f"trace {spans[0]['trace_id']}  {total:.3f}s  {len(spans)} spans"]
+
+    def draw(span, depth):
+        left = int((span["start"] - start) / total * width)
+        length = max(1, int(span["duration"] / total * width))
+        bar = " " * left + "#" * min(length, width - left)
+        mark = "*" if span["span_id"] in critical else " "
+        attrs = {k: v for k, v in span["attrs"].items() if k in ("tool", "r_function", "url", "status", "cache_hit", "iteration", "ttft_s")}
+        label = f"{'  ' * depth}{span['name']} [{span['service']}]"
+        suffix = f" {attrs}" if attrs else ""
+        suffix += f" ERROR {span['error']}" if span.get("error") else ""
+        lines.append(f"{mark} {span['start'] - start:8.3f}s {span['duration']:8.3f}s |{bar:<{width}}| {label}{suffix}")
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+            draw(child, depth + 1)
+
+    for root in sorted(roots, key=lambda s: s["start"]):
+        draw(root, 0)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Span JSONL files")
+    parser.add_argument("--trace", help="Trace id to render (default: the latest question)")
+    parser.add_argument("--list", action="store_true", help="List the questions in the files")
+    parser.add_argument("--width", type=int, default=60)
+    args = parser.parse_args()
+
+    traces = defaultdict(list)
+    for span in load_spans(args.files):
+        traces[span["trace_id"]].append(span)
+    questions = sorted(
+        (s for spans in traces.values() for s in spans if s["name"] == "question"), key=lambda s: s["start"]
+    )
+    if args.list:
+        for q in questions:
+            print(f"{q['trace_id']}  {q['duration']:8.3f}s  {q['attrs'].get('question', '')[:80]}")
+        return
+    trace_id = args.trace or (questions[-1]["trace_id"] if questions else None)
+    if trace_id not in traces:
+        parser.error("No such trace" if args.trace else "No question spans in the files")
+    print(render(traces[trace_id], args.width))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+ARTIFACT_DIR = os.getenv("TM_ARTIFACT_DIR", ".tm_artifacts")
+MAX_BYTES = int(os.getenv("TM_ARTIFACT_MAX_BYTES", 1024 ** 3))
+
+# Handles are valid identifiers, so they double as SQL table and Python variable names
+HANDLE_PATTERN = re.compile(r"\bt_[0-9a-f]{16}\b")
+
+
+def staging_path(extension, root=ARTIFACT_DIR):
+    """Unique path for a result that is still being written (safe across worker processes)."""
+    staging = os.path.join(root, "staging")
+    os.makedirs(staging, exist_ok=True)
+    return os.path.join(staging, f"{os.getpid()}-{uuid.uuid4().hex}{extension}")
+
+
+def _digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed store for tool outputs.
+
+    Files are named by the SHA-256 of their content, so identical results are stored once.
+    Each artifact gets an opaque handle (`t_` + the first 16 hex digits of the hash) and
+    the least recently used artifacts are deleted once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " handle TEXT PRIMARY KEY,"
+            " path TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.deduplicated = 0
+        self.evicted = 0
+
+    def put_file(self, temp_path, kind):
+        """Move a finished file into the store. Returns (handle, path)."""
+        digest = _digest(temp_path)
+        extension = os.path.splitext(temp_path)[1]
+        handle = f"t_{digest[:16]}"
+        path = os.path.join(self.root, digest[:2], digest + extension)
+        now = time.time()
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(temp_path)
+                self.deduplicated += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+            self._conn.execute(
+                "INSERT INTO artifacts (handle, path, kind, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(handle) DO UPDATE SET last_access = excluded.last_access",
+                (handle, path, kind, os.path.getsize(path), now, now),
+            )
+            self._evict(keep=handle)
+            self._conn.commit()
+        return handle, path
+
+    def put_bytes(self, data, extension, kind):
+        temp_path = staging_path(extension, self.root)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return self.put_file(temp_path, kind)
+
+    def resolve(self, handle):
+        """Return the path of an artifact (marking it as recently used), or None if it is gone."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM artifacts WHERE handle = ?", (handle,)
+            ).fetchone()
+            if row is None or not os.path.exists(row[0]):
+                return None
+            self._conn.execute(
+                "UPDATE artifacts SET last_access = ? WHERE handle = ?", (time.time(), handle)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def _evict(self, keep):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT handle, path, size FROM artifacts WHERE handle != ? ORDER BY last_access",
+            (keep,),
+        ).fetchall()
+        for handle, path, size in rows:
+            if total <= self.max_bytes:
+                break
+            if os.path.exists(path):
+                os.remove(path)
+            self._conn.execute("DELETE FROM artifacts WHERE handle = ?", (handle,))
+            total -= size
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts"
+            ).fetchone()
+        return {
+            "artifacts": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "deduplicated": self.deduplicated,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,107 @@
+"""
+Throughput of the server with N concurrent tool callers, before and after async handlers.
+
+The R worker pool is replaced by a stub that sleeps for `--latency` seconds per call (bounded
+by `--workers` like the real pool), and the result cache is bypassed, so the numbers only
+reflect how the server schedules tool calls.
+
+"before" calls execute_r_function directly on the event loop, which is what the synchronous
+tool handlers used to do. "after" goes through FastMCP's call_tool and the async handlers.
+
+Usage:
+    python benchmarks/concurrent_callers.py --callers 8 --latency 1.0 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import mcp_server
+from artifact_store import staging_path
+
+
+class StubPool:
+    def __init__(self, workers, latency):
+        self._slots = threading.Semaphore(workers)
+        self.latency = latency
+
+    def run(self, r_code, var_name=None, trace=None, background=False):
+        with self._slots:
+            time.sleep(self.latency)
+        path = staging_path(".txt")
+        with open(path, "w") as f:
+            f.write(r_code + "\n")
+        return {"type": "list", "file": path, "glimpse": "[]"}
+
+
+class NoCache:
+    def get(self, r_function, args):
+        return None
+
+    def set(self, r_function, args, result, ttl):
+        pass
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "hit_ratio": 0.0, "entries": 0}
+
+
+async def timed_list_tools(issued):
+    """Latency of a list_tools request issued while the tool calls are in flight."""
+    await mcp_server.mcp.list_tools()
+    return time.perf_counter() - issued
+
+
+async def run_before(callers):
+    async def call(i):
+        # A synchronous handler runs on the event loop thread and blocks it
+        return mcp_server.execute_r_function(f"team_urls <- {i}", "team_urls")
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(call(i)) for i in range(callers)]
+    list_tools = asyncio.create_task(timed_list_tools(time.perf_counter()))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, await list_tools
+
+
+async def run_after(callers):
+    async def call(i):
+        return await mcp_server.mcp.call_tool(
+            "get_team_urls", {"country_name": "England", "start_year": 2000 + i}
+        )
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(call(i)) for i in range(callers)]
+    list_tools = asyncio.create_task(timed_list_tools(time.perf_counter()))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, await list_tools
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds per stubbed R call")
+    parser.add_argument("--workers", type=int, default=4, help="Size of the stubbed R worker pool")
+    args = parser.parse_args()
+
+    pool = StubPool(args.workers, args.latency)
+    mcp_server.get_worker_pool = lambda limiter: pool
+    mcp_server.cache = NoCache()
+
+    report = {"callers": args.callers, "latency": args.latency, "workers": args.workers}
+    for name, runner in (("before", run_before), ("after", run_after)):
+        elapsed, list_tools = asyncio.run(runner(args.callers))
+        report[name] = {
+            "seconds": round(elapsed, 3),
+            "calls_per_second": round(args.callers / elapsed, 2),
+            "list_tools_latency": round(list_tools, 3),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
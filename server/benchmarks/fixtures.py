@@ -0,0 +1,184 @@
+"""
+Deterministic stand-ins for the data worldfootballR returns, at realistic sizes.
+
+FIXTURES maps each worldfootballR function the server calls to its rows (or list length) and
+columns. Values are generated from the column names: URLs, names, counts, money strings such
+as "€12.50m", dates and repeating categories, so that conversion, profiling and Parquet writes
+do the same kind of work as on scraped data.
+"""
+import numpy as np
+import pandas as pd
+
+BASE_URL = "https://www.transfermarkt.com"
+TEAMS = 20
+MATCHDAYS = 38
+
+# Lists: (length, kind of URL). Data frames: (rows, columns).
+LISTS = {
+    "tm_league_team_urls": (TEAMS, "team"),
+    "tm_team_player_urls": (30, "player"),
+    "tm_team_staff_urls": (1, "staff"),
+}
+FRAMES = {
+    "tm_matchday_table": (
+        TEAMS * MATCHDAYS,
+        ["country", "league", "matchday", "rk", "squad", "p", "w", "d", "l", "gf", "ga", "g_diff", "pts"],
+    ),
+    "tm_player_market_values": (
+        500,
+        ["comp_name", "region", "country", "season_start_year", "squad", "player_num", "player_name",
+         "player_position", "player_dob", "player_age", "player_nationality", "current_club",
+         "player_height_mtrs", "player_foot", "date_joined", "joined_from", "contract_expiry",
+         "player_market_value_euro", "player_url"],
+    ),
+    "tm_league_debutants": (
+        60,
+        ["comp_name", "country", "comp_url", "player_name", "player_url", "position", "nationality",
+         "second_nationality", "debut_for", "debut_date", "opponent", "goals_for", "goals_against",
+         "age_debut", "value_at_debut", "player_market_value", "appearances", "goals", "minutes_played",
+         "debut_type"],
+    ),
+    "tm_expiring_contracts": (
+        150,
+        ["comp_name", "country", "comp_url", "player_name", "player_url", "date_of_birth", "position",
+         "nationality", "second_nationality", "current_club", "contract_expiry", "contract_option",
+         "player_market_value", "transfer_fee", "agent"],
+    ),
+    "tm_league_injuries": (
+        80,
+        ["comp_name", "country", "comp_url", "player_name", "player_url", "position", "current_club", "age",
+         "nationality", "second_nationality", "injury", "injured_since", "injured_until", "player_market_value"],
+    ),
+    "tm_team_transfers": (
+        40,
+        ["team_name", "league", "country", "season", "transfer_type", "player_name", "player_url",
+         "player_position", "player_age", "player_nationality", "club_2", "league_2", "country_2",
+         "transfer_fee", "is_loan", "transfer_notes", "window", "in_squad", "appearances", "goals",
+         "minutes_played"],
+    ),
+    "tm_squad_stats": (
+        30,
+        ["team_name", "league", "country", "player_name", "player_url", "player_pos", "player_age",
+         "nationality", "in_squad", "appearances", "goals", "minutes_played"],
+    ),
+    "tm_player_bio": (
+        1,
+        ["player_name", "player_id", "citizenship", "position", "current_club", "joined", "contract_expires",
+         "player_valuation", "max_player_valuation", "max_player_valuation_date", "squad_number", "URL",
+         "picture_url", "date_of_birth"],
+    ),
+    "tm_player_injury_history": (
+        10,
+        ["player_name", "player_url", "season_injured", "injury", "injured_since", "injured_until",
+         "duration", "games_missed", "club_missed_games_for"],
+    ),
+    "tm_player_transfer_history": (
+        8,
+        ["player_name", "player_url", "season", "transfer_date", "country_from", "team_from", "country_to",
+         "team_to", "market_value", "transfer_fee", "transfer_type"],
+    ),
+    "tm_get_player_absence": (
+        12,
+        ["player_name", "player_url", "season", "absence_suspension", "competition", "from", "until", "days",
+         "games_missed", "club_missed"],
+    ),
+    "tm_team_staff_history": (
+        25,
+        ["team_name", "league", "country", "staff_role", "staff_name", "staff_url", "staff_dob",
+         "staff_nationality", "staff_nationality_secondary", "appointed", "end_date", "days_in_post",
+         "matches", "wins", "draws", "losses", "ppg"],
+    ),
+    "tm_staff_job_history": (
+        10,
+        ["name", "current_club", "current_role", "date_of_birth", "citizenship", "coaching_licence",
+         "avg_term_as_coach", "position", "club", "appointed", "contract_expiry", "days_in_charge", "matches",
+         "wins", "draws", "losses", "players_used", "avg_goals_for", "avg_goals_against", "ppm", "staff_url"],
+    ),
+    "tm_get_suspensions": (
+        30,
+        ["Country", "Competition", "Player", "Position", "Club", "Age", "Reason", "Since", "Until",
+         "Matches_Missed"],
+    ),
+    "tm_get_risk_of_suspension": (
+        40,
+        ["Country", "Competition", "Player", "Position", "Club", "Age", "Yellow_Cards"],
+    ),
+}
+
+MONEY_HINTS = ("market_value", "valuation", "transfer_fee", "value_at_debut")
+DATE_HINTS = ("date", "dob", "since", "until", "joined", "appointed", "expir", "from", "end_date")
+COUNT_HINTS = ("age", "goals", "appearances", "minutes", "matches", "wins", "draws", "losses", "days",
+               "games", "duration", "num", "number", "squad", "rk", "pts", "yellow", "missed", "used")
+SHORT_NUMBERS = {"p", "w", "d", "l", "gf", "ga", "g_diff", "in_squad", "player_id"}
+
+
+def _urls(kind, rows):
+    path = {"team": "startseite/verein", "player": "profil/spieler", "staff": "profil/trainer"}[kind]
+    return [f"{BASE_URL}/{kind}-{i}/{path}/{1000 + i}" for i in range(rows)]
+
+
+def _column(name, rows, rng):
+    lower = name.lower()
+    if lower.endswith("url"):
+        kind = "team" if "comp" in lower or "club" in lower else "staff" if "staff" in lower else "player"
+        return _urls(kind, rows)
+    if lower in ("player_name", "player", "name", "staff_name"):
+        return [f"Player {i}" for i in range(rows)]
+    if any(hint in lower for hint in MONEY_HINTS):
+        values = rng.choice([0.3, 1.5, 4.0, 12.5, 35.0, 80.0], size=rows)
+        return [f"€{v:.2f}m" for v in values]
+    if any(hint in lower for hint in DATE_HINTS) and lower != "joined_from":
+        days = rng.integers(0, 365 * 15, size=rows)
+        return pd.Timestamp("2010-01-01") + pd.to_timedelta(days, unit="D")
+    if lower in SHORT_NUMBERS or any(hint in lower for hint in COUNT_HINTS) and lower != "squad":
+        return rng.integers(0, 40, size=rows)
+    if lower in ("ppg", "ppm", "player_height_mtrs") or lower.startswith("avg"):
+        return np.round(rng.uniform(0.5, 2.5, size=rows), 2)
+    if lower == "is_loan":
+        return rng.random(rows) < 0.2
+    return [f"{name} {i}" for i in rng.integers(0, 12, size=rows)]
+
+
+def fixture(r_function):
+    """The recorded result of `r_function`: a list of URLs or a data frame."""
+    if r_function in LISTS:
+        length, kind = LISTS[r_function]
+        return _urls(kind, length)
+    rows, columns = FRAMES[r_function]
+    rng = np.random.default_rng(sum(map(ord, r_function)))
+    df = pd.DataFrame({column: _column(column, rows, rng) for column in columns})
+    if r_function == "tm_matchday_table":
+        df["matchday"] = np.repeat(np.arange(1, MATCHDAYS + 1), TEAMS)
+        df["squad"] = [f"Team {i}" for i in range(TEAMS)] * MATCHDAYS
+        df["rk"] = list(range(1, TEAMS + 1)) * MATCHDAYS
+    return df
+
+
+def r_prelude(directory):
+    """
+    R code defining stubs of the worldfootballR functions that read these fixtures from CSV
+    files in `directory` (written by write_csv_fixtures), so the real R worker path runs offline.
+    """
+    lines = [
+        f'.tm_fixture <- function(name) utils::read.csv(file.path("{directory}", paste0(name, ".csv")), '
+        f'stringsAsFactors = FALSE, check.names = FALSE)'
+    ]
+    for r_function in LISTS:
+        lines.append(f'{r_function} <- function(...) .tm_fixture("{r_function}")$value')
+    for r_function in FRAMES:
+        if r_function == "tm_matchday_table":
+            lines.append(
+                f'{r_function} <- function(..., matchday) {{ t <- .tm_fixture("{r_function}"); '
+                f't[t$matchday %in% matchday, , drop = FALSE] }}'
+            )
+        else:
+            lines.append(f'{r_function} <- function(...) .tm_fixture("{r_function}")')
+    return "\n".join(lines)
+
+
+def write_csv_fixtures(directory):
+    for r_function in list(LISTS) + list(FRAMES):
+        data = fixture(r_function)
+        if isinstance(data, list):
+            data = pd.DataFrame({"value": data})
+        data.to_csv(f"{directory}/{r_function}.csv", index=False)
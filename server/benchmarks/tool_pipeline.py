@@ -0,0 +1,289 @@
+"""
+Offline benchmark of every MCP tool against a stubbed worldfootballR.
+
+Each tool is called through FastMCP's call_tool with sample arguments, first against an empty
+cache and artifact store ("cold", which runs the stubbed scrape, conversion, Parquet write,
+profile and store) and then `--repeat` times against the warm cache. The stubs return the
+fixtures in benchmarks/fixtures.py (e.g. a 38-matchday table, a 500-player market value table).
+
+Stubs:
+    r       R worker processes with the worldfootballR functions replaced by R stubs that read
+            the fixtures from CSV, so rpy2 conversion runs as in production (needs R + rpy2).
+    python  an in-process, single-worker pool that hands the fixtures straight to the worker's
+            write path, for machines without R.
+    replay  R worker processes running the real worldfootballR against responses recorded with
+            TM_HTTP_MODE=record (`--cassette`), without network or sleeps: full-fidelity scrapes
+            whose timings only change with the code. Tools whose pages were not recorded fail.
+
+The report records per tool the cold and median warm latency, per-stage timings, the peak
+Python memory allocated during the cold call (tracemalloc, server process only), artifacts
+and bytes written, and the response size. `--compare` diffs two reports.
+
+Usage:
+    python benchmarks/tool_pipeline.py --stub r --output bench.json
+    python benchmarks/tool_pipeline.py --stub replay --cassette .tm_cache/cassette.sqlite
+    python benchmarks/tool_pipeline.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVER_DIR)
+
+# Keep the benchmark's cache, artifacts and metrics away from the server's own
+WORK_DIR = tempfile.mkdtemp(prefix="tm-bench-")
+os.environ.update({
+    "TM_CACHE_DIR": os.path.join(WORK_DIR, "cache"),
+    "TM_ARTIFACT_DIR": os.path.join(WORK_DIR, "artifacts"),
+    "TM_METRICS_FILE": "",
+    "TM_TRACE_FILE": "",
+})
+
+import fixtures
+
+TEAM_URL = f"{fixtures.BASE_URL}/team-1/startseite/verein/1001/saison_id/2023"
+PLAYER_URLS = fixtures._urls("player", 25)
+STAFF_URLS = fixtures._urls("staff", 10)
+
+# Arguments per tool; "{handle}" is replaced by the handle of a stored market value table
+SAMPLE_ARGS = {
+    "get_team_urls": {"country_name": "England", "start_year": 2023},
+    "get_team_player_urls": {"team_url": TEAM_URL},
+    "get_team_staff_urls": {"team_urls": TEAM_URL, "staff_role": "Manager"},
+    "get_matchday_table": {"country_name": "England", "start_year": 2023, "matchday": "1:38"},
+    "get_league_debutants": {"country_name": "England", "debut_type": "league", "debut_start_year": 2019, "debut_end_year": 2023},
+    "get_expiring_contracts": {"country_name": "England", "contract_end_year": 2025},
+    "get_league_injuries": {"country_name": "England"},
+    "get_team_transfers": {"team_url": TEAM_URL},
+    "get_squad_stats": {"team_url": TEAM_URL},
+    "get_league_team_transfers": {"country_name": "England", "start_year": 2023},
+    "get_league_squad_stats": {"country_name": "England", "start_year": 2023},
+    "get_player_market_values": {"country_name": "England", "start_year": 2023},
+    "get_player_bio": {"player_url": PLAYER_URLS[0]},
+    "get_player_injury_history": {"player_url": PLAYER_URLS[0]},
+    "get_player_transfer_history": {"player_url": PLAYER_URLS[0]},
+    "get_player_absence": {"player_url": PLAYER_URLS[0]},
+    "get_team_staff_history": {"team_url": TEAM_URL, "staff_role": "Manager"},
+    "get_staff_job_history": {"staff_url": STAFF_URLS[0]},
+    "get_player_bio_batch": {"player_urls": PLAYER_URLS},
+    "get_player_injury_history_batch": {"player_urls": PLAYER_URLS},
+    "get_player_transfer_history_batch": {"player_urls": PLAYER_URLS},
+    "get_player_absence_batch": {"player_urls": PLAYER_URLS},
+    "get_staff_job_history_batch": {"staff_urls": STAFF_URLS},
+    "get_suspensions": {"country_name": "England"},
+    "get_risk_of_suspension": {"country_name": "England"},
+    "query_results": {"sql": "SELECT squad, COUNT(*) AS players FROM {handle} GROUP BY squad ORDER BY players DESC"},
+    "fetch_rows": {"handle": "{handle}", "limit": 100, "sort_by": "player_age", "descending": True},
+    "resolve_entity": {"name": "Player 17"},
+    "get_cache_stats": {},
+    "server_stats": {},
+    "execute_python_code": {"python_code": "open(result_file, 'w').write(str({handle}.groupby('squad').size().describe()))"},
+    "evict_python_variables": {},
+}
+
+FUNCTION_PATTERN = re.compile(r"\b(tm_[a-z_]+)\(")
+MATCHDAY_PATTERN = re.compile(r"\bmatchday = (\d+)")
+
+
+class PythonStubPool:
+    """
+    Stands in for RWorkerPool: returns the fixture of the called function via the worker's write
+    path. Calls run one at a time (like a single worker) since the stage timings are per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def run(self, r_code, var_name=None, trace=None, background=False):
+        with self._lock:
+            return self._run(r_code)
+
+    def _run(self, r_code):
+        import r_worker
+        r_function = FUNCTION_PATTERN.search(r_code).group(1)
+        r_worker.stage_times.clear()
+        data = fixtures.fixture(r_function)
+        if isinstance(data, list):
+            result = r_worker.write_list(data)
+        else:
+            if r_function == "tm_matchday_table":
+                data = data[data["matchday"] == int(MATCHDAY_PATTERN.search(r_code).group(1))].reset_index(drop=True)
+            result = r_worker.write_dataframe(data)
+        result["timings"] = dict(r_worker.stage_times)
+        return result
+
+
+def make_pool(stub, limiter):
+    if stub == "python":
+        return PythonStubPool()
+    from r_worker import RWorkerPool
+    if stub == "replay":
+        return RWorkerPool(size=int(os.getenv("TM_R_WORKERS", 4)), limiter=limiter, timeout=120)
+    directory = os.path.join(WORK_DIR, "fixtures")
+    os.makedirs(directory, exist_ok=True)
+    fixtures.write_csv_fixtures(directory)
+    return RWorkerPool(size=int(os.getenv("TM_R_WORKERS", 4)), limiter=limiter, timeout=120,
+                       prelude=fixtures.r_prelude(directory))
+
+
+def reset_state(server, name):
+    """Fresh cache, artifact store, analysis kernel and metrics, so the next call is cold."""
+    from artifact_store import ArtifactStore
+    from metrics import Metrics
+    from result_cache import ResultCache
+    root = os.path.join(WORK_DIR, name)
+    server.cache = ResultCache(os.path.join(root, "cache", "results.sqlite"))
+    server.store = ArtifactStore(root=os.path.join(root, "artifacts"))
+    server._default_kernel = None
+    server.metrics = Metrics()
+
+
+async def call(server, name, args):
+    started = time.perf_counter()
+    content = await server.mcp.call_tool(name, args)
+    text = "".join(getattr(item, "text", "") for item in content)
+    return time.perf_counter() - started, text
+
+
+async def prepare_handle(server):
+    _, text = await call(server, "get_player_market_values", SAMPLE_ARGS["get_player_market_values"])
+    return re.search(r"'handle': '(t_[0-9a-f]{16})'", text).group(1)
+
+
+def fill(args, handle):
+    return json.loads(json.dumps(args).replace("{handle}", handle or ""))
+
+
+async def bench_tool(server, name, repeat):
+    reset_state(server, name)
+    handle = await prepare_handle(server) if "{handle}" in json.dumps(SAMPLE_ARGS[name]) else None
+    args = fill(SAMPLE_ARGS[name], handle)
+    server.metrics = type(server.metrics)()
+    before = server.store.stats()
+    cold, text = await call(server, name, args)
+    stages = server.metrics.histograms("tm_stage_duration_seconds", "stage")
+    written = server.store.stats()
+    warm = [(await call(server, name, args))[0] for _ in range(repeat)]
+
+    # Memory on a second cold call: tracemalloc slows Python down, so it is not timed
+    reset_state(server, name + "-memory")
+    handle = await prepare_handle(server) if handle else None
+    tracemalloc.start()
+    await call(server, name, fill(SAMPLE_ARGS[name], handle))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "cold_s": round(cold, 4),
+        "warm_s": round(statistics.median(warm), 4) if warm else None,
+        "stages": {stage: {"count": s["count"], "total_s": s["total_s"]} for stage, s in stages.items()},
+        "peak_python_bytes": peak,
+        "artifacts_written": written["artifacts"] - before["artifacts"],
+        "bytes_written": written["bytes"] - before["bytes"],
+        "response_bytes": len(text.encode()),
+        "error": text.startswith("{'type': 'error'") or text.startswith("Error"),
+    }
+
+
+async def run(stub, repeat, only):
+    import mcp_server
+    pool = make_pool(stub, mcp_server.rate_limiter)
+    mcp_server.get_worker_pool = lambda limiter: pool
+    tools = [tool.name for tool in await mcp_server.mcp.list_tools()]
+    report = {"tools": {}, "skipped": []}
+    for name in tools:
+        if only and name not in only:
+            continue
+        if name not in SAMPLE_ARGS:
+            report["skipped"].append(name)
+            continue
+        report["tools"][name] = await bench_tool(mcp_server, name, repeat)
+        print(f"{name:40s} cold {report['tools'][name]['cold_s']:8.4f}s", file=sys.stderr)
+    if hasattr(pool, "close"):
+        pool.close()
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path, threshold):
+    """Print per-tool ratios of two reports. Returns the number of metrics above `threshold`."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    regressions = 0
+    for name, new in sorted(after["tools"].items()):
+        old = before["tools"].get(name)
+        if old is None:
+            print(f"{name:40s} new")
+            continue
+        cells = []
+        for metric in ("cold_s", "warm_s", "peak_python_bytes", "bytes_written", "response_bytes"):
+            if not old.get(metric) or new.get(metric) is None:
+                continue
+            ratio = new[metric] / old[metric]
+            flag = " !" if ratio > threshold else ""
+            regressions += bool(flag)
+            cells.append(f"{metric} x{ratio:.2f}{flag}")
+        print(f"{name:40s} " + "  ".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stub", choices=["r", "python", "replay"], default="r")
+    parser.add_argument("--cassette", help="Recorded responses to replay (--stub replay)")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm calls per tool")
+    parser.add_argument("--tools", nargs="*", help="Only benchmark these tools")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two reports")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Ratio flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    if args.stub == "replay":
+        if not args.cassette or not os.path.exists(args.cassette):
+            parser.error("--stub replay needs an existing --cassette")
+        os.environ.update({"TM_HTTP_MODE": "replay", "TM_CASSETTE": os.path.abspath(args.cassette)})
+
+    report = {
+        "commit": git_commit(),
+        "stub": args.stub,
+        "cassette": args.cassette,
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **asyncio.run(run(args.stub, args.repeat, args.tools)),
+    }
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# live: fetch from the network; record: fetch and store every response; replay: serve stored responses only
+HTTP_MODES = ("live", "record", "replay")
+
+
+def http_mode():
+    mode = os.getenv("TM_HTTP_MODE", "live").strip().lower() or "live"
+    if mode not in HTTP_MODES:
+        raise ValueError(f"TM_HTTP_MODE must be one of {', '.join(HTTP_MODES)}, not {mode!r}")
+    return mode
+
+
+def cassette_path():
+    return os.getenv("TM_CASSETTE", os.path.join(os.getenv("TM_CACHE_DIR", ".tm_cache"), "cassette.sqlite"))
+
+
+class Cassette:
+    """HTTP responses fetched by worldfootballR, zlib-compressed in a SQLite file.
+
+    Responses are keyed by the R function that fetched them (`read_html` or `GET`) and the URL;
+    recording the same URL again replaces the stored response.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " fun_name TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " recorded_at REAL NOT NULL,"
+            " PRIMARY KEY (fun_name, url))"
+        )
+        self._conn.commit()
+
+    def get(self, fun_name, url):
+        """The recorded response as a dict with status, content_type and body (bytes), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, content_type, body FROM responses WHERE fun_name = ? AND url = ?",
+                (fun_name, url),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "content_type": row[1], "body": zlib.decompress(row[2])}
+
+    def put(self, fun_name, url, status, content_type, body):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (fun_name, url, status, content_type, body, size, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fun_name, url, int(status), content_type or "", zlib.compress(body, 6), len(body), time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            responses, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+        return {
+            "responses": responses,
+            "bytes": size,
+            "compressed_bytes": stored,
+        }
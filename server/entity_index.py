@@ -0,0 +1,169 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import pandas as pd
+
+# Transfermarkt URLs carry the entity's slug, type and id:
+# https://www.transfermarkt.com/erling-haaland/profil/spieler/418560
+URL_PATTERN = re.compile(r"transfermarkt\.[a-z.]+/([^/?#]+)/[^/?#]+/(verein|spieler|trainer)/(\d+)")
+URL_KINDS = {"verein": "team", "spieler": "player", "trainer": "staff"}
+
+# Candidates scoring below this share too few trigrams with the query to be useful
+MIN_SCORE = 0.3
+
+# Letters that have no decomposition into a base letter plus accent
+FOLD = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ß": "ss", "đ": "d", "ð": "d", "ł": "l", "ı": "i", "þ": "th"})
+
+
+def normalize_name(name):
+    """Lowercase, fold accents ("Ødegaard" -> "odegaard") and reduce punctuation to single spaces."""
+    name = unicodedata.normalize("NFKD", str(name).lower().translate(FOLD))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+def trigrams(norm):
+    """Trigrams of each word, padded so that word starts weigh more (as in pg_trgm)."""
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def parse_url(url):
+    """Return (kind, entity key, name from the slug) of a Transfermarkt URL, or None."""
+    match = URL_PATTERN.search(str(url))
+    if match is None:
+        return None
+    slug, path_kind, tm_id = match.groups()
+    kind = URL_KINDS[path_kind]
+    return kind, f"{kind}:{tm_id}", slug.replace("-", " ").title()
+
+
+class EntityIndex:
+    """Local name -> URL index of the teams, players and staff seen in tool results.
+
+    Names are matched on accent-folded trigrams, so "Odegaard", "ødegaard" and "Martin Odegard"
+    find the same player. Every entity keeps the URL it was last seen with.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS names ("
+            " id INTEGER PRIMARY KEY,"
+            " entity TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " norm TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " grams INTEGER NOT NULL,"
+            " UNIQUE (entity, norm));"
+            "CREATE TABLE IF NOT EXISTS grams (gram TEXT NOT NULL, name_id INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS grams_gram ON grams (gram);"
+            "CREATE TABLE IF NOT EXISTS sources (handle TEXT PRIMARY KEY);"
+        )
+        self._conn.commit()
+
+    def add(self, entries):
+        """Index (name, url) pairs. URLs that are not team, player or staff pages are skipped."""
+        with self._lock:
+            for name, url in entries:
+                parsed = parse_url(url)
+                if parsed is None:
+                    continue
+                kind, entity, slug_name = parsed
+                name = name if isinstance(name, str) and name.strip() else slug_name
+                norm = normalize_name(name)
+                if not norm:
+                    continue
+                self._conn.execute("UPDATE names SET url = ? WHERE entity = ?", (url, entity))
+                grams = trigrams(norm)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO names (entity, kind, name, norm, url, grams)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (entity, kind, name, norm, url, len(grams)),
+                )
+                if cursor.rowcount:
+                    self._conn.executemany(
+                        "INSERT INTO grams (gram, name_id) VALUES (?, ?)",
+                        [(gram, cursor.lastrowid) for gram in grams],
+                    )
+            self._conn.commit()
+
+    def add_result(self, result):
+        """
+        Index a stored tool result once: URL lists by their slugs, and data frames through
+        every `*url` column, named by the matching `*name` column when there is one.
+        """
+        handle = result.get("handle")
+        if handle is None or result["type"] not in ("list", "dataframe"):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM sources WHERE handle = ?", (handle,)).fetchone():
+                return
+        if result["type"] == "list":
+            with open(result["file"]) as f:
+                entries = [(None, line.strip()) for line in f]
+        else:
+            url_columns = [c for c in result["columns"] if c.lower().endswith("url")]
+            pairs = {c: c[:-3] + "name" for c in url_columns}
+            pairs = {c: n if n in result["columns"] else None for c, n in pairs.items()}
+            entries = []
+            if url_columns:
+                df = pd.read_parquet(result["file"], columns=url_columns + [n for n in pairs.values() if n])
+                for url_column, name_column in pairs.items():
+                    names = df[name_column] if name_column else [None] * len(df)
+                    entries.extend(zip(names, df[url_column]))
+        self.add(entries)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO sources (handle) VALUES (?)", (handle,))
+            self._conn.commit()
+
+    def search(self, name, kind=None, limit=5):
+        """
+        Rank indexed entities by trigram similarity to `name`.
+
+        The score mixes how much of the query is found in a name with the Dice coefficient of
+        both, so "Haaland" ranks "Erling Haaland" first. Returns at most `limit` candidates,
+        one per entity.
+        """
+        norm = normalize_name(name)
+        grams = trigrams(norm)
+        if not grams:
+            return []
+        placeholders = ",".join("?" * len(grams))
+        query = (
+            "SELECT n.entity, n.kind, n.name, n.norm, n.url, n.grams, COUNT(*) AS shared"
+            f" FROM grams g JOIN names n ON n.id = g.name_id WHERE g.gram IN ({placeholders})"
+        )
+        params = list(grams)
+        if kind:
+            query += " AND n.kind = ?"
+            params.append(kind)
+        query += " GROUP BY n.id ORDER BY shared DESC LIMIT 200"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        best = {}
+        for entity, entity_kind, entity_name, entity_norm, url, size, shared in rows:
+            score = 0.6 * shared / len(grams) + 0.4 * 2 * shared / (len(grams) + size)
+            if entity_norm == norm:
+                score = 1.0
+            if score < MIN_SCORE:
+                continue
+            if entity not in best or score > best[entity]["score"]:
+                best[entity] = {"name": entity_name, "kind": entity_kind, "url": url, "score": round(score, 3)}
+        return sorted(best.values(), key=lambda c: -c["score"])[:limit]
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(DISTINCT entity) FROM names GROUP BY kind"
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from artifact_store import HANDLE_PATTERN
+
+MAX_BYTES = int(os.getenv("TM_KERNEL_MAX_BYTES", 512 * 1024 ** 2))
+
+
+def _size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, list):
+        return sum(len(v) for v in value if isinstance(v, str))
+    return 0
+
+
+class AnalysisKernel:
+    """Long-lived Python namespace for execute_python_code.
+
+    Every stored tool result can be referenced by its handle: the first cell that mentions
+    it loads it once (Parquet as a DataFrame, URL lists as a list of strings), and later cells
+    reuse the loaded object. Loaded results are evicted least recently used first once they
+    take more than `max_bytes` (as measured when loading them); they are simply reloaded when
+    referenced again. Variables created by the code itself persist until evicted explicitly
+    and are only measured by stats().
+
+    Each kernel has its own scratch directory; `result_file` in the namespace is the file a cell
+    writes its result to, so concurrent sessions never see each other's results.
+    """
+
+    def __init__(self, resolve, max_bytes=MAX_BYTES):
+        self._resolve = resolve
+        self.max_bytes = max_bytes
+        self.scratch_dir = tempfile.mkdtemp(prefix="tm-kernel-")
+        self.result_file = os.path.join(self.scratch_dir, "intermediate_result.txt")
+        weakref.finalize(self, shutil.rmtree, self.scratch_dir, True)
+        self.namespace = {"pd": pd, "os": os, "time": time, "result_file": self.result_file}
+        self._builtins = set(self.namespace)
+        self._loaded = OrderedDict()  # handle -> bytes, least recently used first
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self, handle):
+        if handle in self._loaded:
+            self._loaded.move_to_end(handle)
+            return
+        path = self._resolve(handle)
+        if path is None:
+            return
+        if path.endswith(".parquet"):
+            value = pd.read_parquet(path)
+        else:
+            with open(path) as f:
+                value = [line.rstrip("\n") for line in f]
+        self.namespace[handle] = value
+        self._loaded[handle] = _size(value)
+        self._loaded_bytes += self._loaded[handle]
+
+    def _unload(self, handle):
+        self.namespace.pop(handle, None)
+        self._loaded_bytes -= self._loaded.pop(handle)
+
+    def _evict_to_budget(self, keep):
+        for handle in list(self._loaded):
+            if self._loaded_bytes <= self.max_bytes:
+                break
+            if handle not in keep:
+                self._unload(handle)
+
+    def run(self, code):
+        """
+        Execute `code` in the persistent namespace, loading the results it references.
+        Returns what the code wrote to `result_file` (None if it wrote nothing).
+        """
+        with self._lock:
+            referenced = set(HANDLE_PATTERN.findall(code))
+            for handle in referenced:
+                self._load(handle)
+            self._evict_to_budget(keep=referenced)
+            try:
+                exec(code, self.namespace)
+                if not os.path.exists(self.result_file):
+                    return None
+                with open(self.result_file) as f:
+                    return f.read()
+            finally:
+                if os.path.exists(self.result_file):
+                    os.remove(self.result_file)
+
+    def evict(self, names=None):
+        """Drop the given names (all loaded results when empty). Returns the names removed."""
+        with self._lock:
+            names = names or list(self._loaded)
+            removed = []
+            for name in names:
+                if name in self._builtins or name not in self.namespace:
+                    continue
+                if name in self._loaded:
+                    self._unload(name)
+                else:
+                    del self.namespace[name]
+                removed.append(name)
+            return removed
+
+    def stats(self):
+        with self._lock:
+            variables = {
+                name: _size(value) for name, value in self.namespace.items()
+                if name not in self._builtins and not name.startswith("__")
+                and isinstance(value, (pd.DataFrame, list))
+            }
+            return {
+                "variables": variables,
+                "loaded_results": list(self._loaded),
+                "bytes": sum(variables.values()),
+                "loaded_bytes": self._loaded_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -1,115 +1,362 @@
-import os
 import time
+STARTED = time.perf_counter()
+
+import os
+import sys
+import asyncio
+import argparse
+import contextlib
+import contextvars
+import functools
+import weakref
+import concurrent.futures
 import pandas as pd
 from mcp.server.fastmcp import FastMCP, Context
+from mcp.types import TextContent
 from dotenv import load_dotenv
 import traceback
-import concurrent.futures
 
-# Create MCP server
-mcp = FastMCP("WorldFootballR")
 load_dotenv()
 
-import rpy2.robjects as robjects
-from rpy2.robjects.packages import importr
-from rpy2.robjects import default_converter
-from rpy2.robjects.conversion import localconverter
+from result_cache import (
+    ResultCache, TTL_DAILY, TTL_VOLATILE, current_season_start_year, season_ttl, url_season_ttl
+)
+from rate_limiter import HostRateLimiter
+from r_worker import get_worker_pool
+from cassette import Cassette, cassette_path, http_mode
+from artifact_store import ArtifactStore, staging_path
+from single_flight import SingleFlight
+from results import concat_frames, dataframe_summary, read_rows
+from query import query_artifacts
+from kernel import AnalysisKernel
+from prefetch import PrefetchScheduler
+from entity_index import EntityIndex
+from metrics import Metrics
+import tracing
+
+# Per-tool and per-stage timings and counters, also written in Prometheus text format
+metrics = Metrics(dump_path=os.getenv(
+    "TM_METRICS_FILE", os.path.join(os.getenv("TM_CACHE_DIR", ".tm_cache"), "metrics.prom")
+))
+
+# Spans of tool calls and their stages, continuing the client's trace (off unless TM_TRACE_FILE is set)
+tracer = tracing.Tracer(os.getenv("TM_TRACE_FILE"), service="server")
+
+@contextlib.contextmanager
+def stage(name, **attrs):
+    """Time a pipeline stage for the metrics and record it as a span."""
+    with tracer.span(name, **attrs) as span, metrics.time("tm_stage_duration_seconds", stage=name):
+        yield span
+
+# Results are cached on disk, keyed by R function and normalized arguments
+cache = ResultCache(os.path.join(os.getenv("TM_CACHE_DIR", ".tm_cache"), "results.sqlite"))
+
+# Names of the teams, players and staff in fetched results, for resolving names to URLs
+entities = EntityIndex(os.path.join(os.getenv("TM_CACHE_DIR", ".tm_cache"), "entities.sqlite"))
+
+# Tool outputs live in a content-addressed store that evicts least recently used files
+store = ArtifactStore()
+
+# Identical R calls running at the same time share one scrape
+in_flight = SingleFlight()
+
+# Requests to transfermarkt are throttled per host, only when they hit the network
+rate_limiter = HostRateLimiter.from_env()
+
+# live, or record/replay the R workers' HTTP responses to/from the cassette (validated here, applied in the workers)
+HTTP_MODE = http_mode()
+
+# Tool handlers are async; their blocking R/IO work runs on this executor, whose size
+# bounds how many tool calls are in flight at once.
+executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("TM_MAX_CONCURRENCY", 8)),
+    thread_name_prefix="tool"
+)
+
+# Number of tool calls being served; background prefetching only runs while it is zero
+active_calls = 0
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the tool executor without blocking the event loop."""
+    global active_calls
+    loop = asyncio.get_running_loop()
+    active_calls += 1
+    try:
+        # Run in a copy of the caller's context so that spans started there keep their parent
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
+    finally:
+        active_calls -= 1
+
+def metric_gauges():
+    """Point-in-time values exported next to the counters and histograms."""
+    cache_stats = cache.stats()
+    store_stats = store.stats()
+    return {
+        "tm_cache_hit_ratio": cache_stats["hit_ratio"],
+        "tm_cache_entries": cache_stats["entries"],
+        "tm_artifact_store_bytes": store_stats["bytes"],
+        "tm_tool_calls_in_flight": active_calls,
+    }
+
+class InstrumentedFastMCP(FastMCP):
+    """
+    FastMCP that records latency, errors and response size of every tool call, and traces it.
+    Results are sent as their str() so that the wire format is the Python repr tools always returned.
+    """
+
+    async def call_tool(self, name, arguments):
+        started = time.perf_counter()
+        error = True
+        try:
+            # The client's span arrives as a traceparent in the request's _meta
+            meta = self.get_context().request_context.meta
+            parent = tracing.parse_traceparent((meta.model_extra or {}).get("traceparent")) if meta else None
+        except ValueError:
+            parent = None
+        try:
+            with tracer.span(f"tool {name}", parent=parent, tool=name) as span:
+                result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+                # Tools return their result dict (or plain text); failures are {"type": "error", ...}
+                error = isinstance(result, dict) and result.get("type") == "error"
+                text = result if isinstance(result, str) else str(result)
+                span.update(response_bytes=len(text.encode()), error_result=error)
+            metrics.inc("tm_tool_response_bytes_total", len(text.encode()), tool=name)
+            return [TextContent(type="text", text=text)]
+        finally:
+            metrics.observe("tm_tool_duration_seconds", time.perf_counter() - started, tool=name)
+            metrics.inc("tm_tool_calls_total", tool=name)
+            if error:
+                metrics.inc("tm_tool_errors_total", tool=name)
+            metrics.dump(gauges=metric_gauges())
 
-# Initialize R and install required packages
+# Create MCP server
+mcp = InstrumentedFastMCP("WorldFootballR")
+
+# Check that the locked R packages are installed. Installing or upgrading them is an explicit
+# step (--install-r-packages / --upgrade-r-packages) so that startup stays fast and offline.
 def initialize_r():
-    # Set R environment variables
     try:
-        # Check if devtools is installed
-        robjects.r('''
-        if (!requireNamespace("devtools", quietly = TRUE)) {
-            install.packages("devtools")
-        }
-        ''')
-        
-        # Install worldfootballR package
-        robjects.r('devtools::install_github("JaseZiv/worldfootballR")')
-        
-        # Load the package
-        robjects.r('library(worldfootballR)')
-        return True
+        import r_packages
+        problems = r_packages.check_installed()
+        for problem in problems:
+            print(f"R library out of date: {problem}", file=sys.stderr)
+        if problems:
+            print("Run `python mcp_server.py --install-r-packages` to install the locked versions.", file=sys.stderr)
+        return not problems
     except Exception as e:
-        print(f"Error initializing R: {str(e)}")
+        print(f"Error initializing R: {str(e)}", file=sys.stderr)
         return False
 
-def _run_r_code(r_code, var_name=None):
-    time.sleep(6)
-    
-    # Load the worldfootballR package
-    with localconverter(default_converter):
-        robjects.r('library(worldfootballR)')
-
-        # Execute the R code
-        robjects.r(r_code)
-        
-        # If variable name is provided, use it to reference the result
-        r_variable = var_name if var_name else "result"
-        
-        # Check if the variable exists in R environment
-        exists_check = robjects.r(f'exists("{r_variable}")')
-        if not exists_check[0]:
-            return {
-                "type": "error",
-                "message": f"Variable '{r_variable}' not found in R environment"
-            }
-        
-        # Get the result from R environment
-        result = robjects.r(r_variable)
-
-        if hasattr(result, 'nrow'):
-            temp_file = f"r_result_{time.time()}.csv"
-            robjects.r(f'write.csv({r_variable}, file = "{temp_file}", row.names = FALSE)')
-            
-            # Use dplyr's glimpse instead of df.head()
-            robjects.r('library(dplyr)')
-            robjects.r('library(utils)')
-            glimpse_output = robjects.r(f'paste(capture.output(glimpse({r_variable})), collapse = "\\n")')
-            columns = robjects.r(f'names({r_variable})')
-            col_list = list(columns)
-            
-            return {
-                "type": "dataframe",
-                "file": temp_file,
-                "glimpse": str(glimpse_output[0]),
-                "shape": str(robjects.r(f'dim({r_variable})')),
-                "columns": col_list
-            }
-        else:
-            result_list = list(result)
-            file_path = f"r_result_{time.time()}.txt"
-            with open(file_path, "w") as f:
-                for item in result_list:
-                    f.write(str(item) + "\n")
-            return {
-                "type": "list",
-                "file": file_path,
-                "glimpse": str(result_list[:5] if len(result_list) > 5 else result_list)
-            }
-
-def execute_r_function(r_code, var_name=None):
+def execute_r_function(r_code, var_name=None, cache_key=None, ttl=TTL_DAILY, refresh=False, background=False):
+    """
+    Run R code and return the result dict.
+
+    Identical calls (same R code and variable) that arrive while one is already running
+    wait for its result instead of scraping again.
+
+    Args:
+        cache_key: Optional (r_function, args) tuple. When given, the result is looked up in
+            and stored to the on-disk cache.
+        ttl: Seconds the cached result stays valid, None for results that never change.
+        refresh: Skip the cache lookup and store a fresh result (used by the prefetcher).
+        background: Give the HTTP requests lower priority than tool calls (used by the prefetcher).
+    """
+    r_function = cache_key[0] if cache_key else "custom"
+    with tracer.span("execute_r_function", r_function=r_function) as span:
+        if cache_key is not None and not refresh:
+            with stage("cache_lookup"):
+                cached = cache.get(*cache_key)
+            metrics.inc("tm_cache_lookups_total", r_function=r_function, result="miss" if cached is None else "hit")
+            span["cache_hit"] = cached is not None
+            if cached is not None:
+                # Mark the artifact as recently used so it is not evicted
+                store.resolve(cached.get("handle"))
+                index_entities(cached)
+                return cached
+        result = in_flight.do(
+            (r_code, var_name), lambda: _run_r_function(r_code, var_name, cache_key, ttl, background)
+        )
+        span["result"] = result["type"]
+        index_entities(result)
+        return result
+
+def index_entities(result):
+    """Feed the names and URLs of a result to the entity index (each stored result only once)."""
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(_run_r_code, r_code, var_name)
-            return future.result(timeout=180)  # Timeout in seconds (3 minutes)
-    except concurrent.futures.TimeoutError:
-        return {
-            "type": "error",
-            "message": "Execution time exceeded 3 minutes. The process took too long and was terminated."
-        }
+        entities.add_result(result)
     except Exception as e:
-        return {
+        print(f"Error indexing {result.get('handle')}: {str(e)}", file=sys.stderr)
+
+def _run_r_function(r_code, var_name, cache_key, ttl, background=False):
+    r_function = cache_key[0] if cache_key else "custom"
+    try:
+        with stage("r_worker"):
+            result = get_worker_pool(rate_limiter).run(r_code, var_name, tracing.current(), background)
+        # Stages measured inside the worker: rate_limit_wait, r_eval, convert, write, profile
+        timings = result.pop("timings", {})
+        metrics.inc("tm_http_requests_total", timings.pop("http_requests", 0), r_function=r_function)
+        for name, seconds in timings.items():
+            metrics.observe("tm_stage_duration_seconds", seconds, stage=name)
+        if result["type"] != "error":
+            metrics.inc("tm_artifact_bytes_written_total", os.path.getsize(result["file"]), kind=result["type"])
+            if result["type"] == "dataframe":
+                metrics.inc("tm_result_rows_total", int(result["shape"].strip("()").split(",")[0]), r_function=r_function)
+            with stage("store"):
+                result["handle"], result["file"] = store.put_file(result["file"], result["type"])
+    except Exception as e:
+        result = {
             "type": "error",
             "message": str(e),
             "traceback": traceback.format_exc()
         }
+    if result["type"] == "error":
+        metrics.inc("tm_r_errors_total", r_function=r_function)
+    if cache_key is not None:
+        cache.set(*cache_key, result, ttl)
+    return result
+
+def store_dataframe(df):
+    """Write a data frame assembled on the server side to the artifact store."""
+    with stage("write"):
+        temp_file = staging_path(".parquet")
+        df.to_parquet(temp_file, index=False)
+    metrics.inc("tm_artifact_bytes_written_total", os.path.getsize(temp_file), kind="dataframe")
+    with stage("store"):
+        handle, path = store.put_file(temp_file, "dataframe")
+    with stage("profile"):
+        summary = dataframe_summary(df)
+    return {"type": "dataframe", "handle": handle, "file": path, **summary}
+
+# Hard limit on the size of a fetch_rows response
+FETCH_MAX_BYTES = int(os.getenv("TM_FETCH_MAX_BYTES", 16000))
+
+# Bounds the R calls a single batch tool keeps in flight, so one batch cannot take every slot
+FAN_OUT_CONCURRENCY = int(os.getenv("TM_FAN_OUT_CONCURRENCY", 4))
+
+# Multi-call tools return what they have after this many seconds instead of running into the
+# client's timeout; the calls still running finish in the background and land in the cache.
+PARTIAL_RESULT_SECONDS = float(os.getenv("TM_PARTIAL_RESULT_SECONDS", 150))
+
+async def report_progress(ctx, done, total):
+    """Send an MCP progress notification if the client asked for them. Never fails the tool."""
+    if ctx is None:
+        return
+    try:
+        await ctx.report_progress(done, total)
+    except Exception:
+        # Outside a request (e.g. benchmarks) or the client went away
+        pass
+
+async def fan_out(calls, ctx=None):
+    """
+    Run one execute_r_function call per key concurrently and combine the data frames.
+
+    A progress notification is sent after every finished call. Once PARTIAL_RESULT_SECONDS
+    have passed the calls that are done are combined and returned, the others are listed in
+    `pending` and keep running so that calling the tool again picks them up from the cache.
+
+    Args:
+        calls: dict mapping a key (e.g. a player URL) to execute_r_function keyword arguments.
+        ctx: The tool's MCP Context, used for progress notifications.
+
+    Returns:
+        A dataframe result holding the rows of every successful call (in the order of `calls`),
+        plus `errors` mapping each failed key to its error message, `partial` and `pending`.
+    """
+    slots = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+
+    async def run(kwargs):
+        async with slots:
+            return await run_blocking(execute_r_function, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PARTIAL_RESULT_SECONDS
+    tasks = {asyncio.ensure_future(run(kwargs)): key for key, kwargs in calls.items()}
+    results, pending = {}, set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, timeout=max(deadline - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for task in done:
+            results[tasks[task]] = task.result()
+        await report_progress(ctx, len(results), len(calls))
+
+    frames, errors = [], {}
+    for key in calls:
+        result = results.get(key)
+        if result is None:
+            continue
+        if result["type"] == "dataframe":
+            frames.append(result["file"])
+        else:
+            errors[key] = result.get("message", f"Unexpected result type {result['type']}")
+    pending = [key for key in calls if key not in results]
+    if not frames:
+        message = "Every call failed" if not pending else f"No call finished within {PARTIAL_RESULT_SECONDS:g} seconds"
+        return {"type": "error", "message": message, "errors": errors, "pending": pending}
+    try:
+        combined = await run_blocking(
+            lambda: store_dataframe(concat_frames([pd.read_parquet(f) for f in frames]))
+        )
+    except Exception as e:
+        # Still report which calls failed or are pending
+        return {
+            "type": "error", "message": f"Could not combine {len(frames)} results: {e}",
+            "errors": errors, "pending": pending
+        }
+    combined["errors"] = errors
+    combined["partial"] = bool(pending)
+    combined["pending"] = pending
+    return combined
+
+def _team_urls_call(country_name, start_year, league_url=""):
+    if league_url:
+        r_code = f'''
+        team_urls <- tm_league_team_urls(
+            country_name = "{country_name}",
+            start_year = {start_year},
+            league_url = "{league_url}"
+        )
+        '''
+    else:
+        r_code = f'''
+        team_urls <- tm_league_team_urls(
+            country_name = "{country_name}",
+            start_year = {start_year}
+        )
+        '''
+    return dict(
+        r_code=r_code, var_name="team_urls",
+        cache_key=("tm_league_team_urls", {
+            "country_name": country_name, "start_year": start_year, "league_url": league_url
+        }),
+        ttl=season_ttl(start_year)
+    )
+
+async def league_fan_out(country_name, start_year, league_url, team_call, ctx=None):
+    """
+    Resolve the league's team URLs and run `team_call(team_url)` for every club via fan_out.
+
+    Returns:
+        The fan_out result (errors keyed by team URL) plus the number of `teams` in the league.
+    """
+    team_urls = await run_blocking(
+        execute_r_function, **_team_urls_call(country_name, start_year, league_url)
+    )
+    if team_urls["type"] != "list":
+        return {"type": "error", "message": f"Could not get the league's team URLs: {team_urls.get('message')}"}
+    with open(team_urls["file"]) as f:
+        urls = [line.strip() for line in f if line.strip()]
+    result = await fan_out({url: team_call(url) for url in urls}, ctx)
+    result["teams"] = len(urls)
+    return result
 
 # Tool to get team URLs
 @mcp.tool()
-def get_team_urls(country_name: str, start_year: int) -> str:
+async def get_team_urls(country_name: str, start_year: int) -> dict:
     """
     Get team URLs for a specific country and season from Transfermarkt.
     
@@ -119,21 +366,16 @@ def get_team_urls(country_name: str, start_year: int) -> str:
     
     Returns:
         type: list | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
         glimpse: str | None # Glimpse of the data (the first 5 urls).
     """
-    r_code = f'''
-    team_urls <- tm_league_team_urls(
-        country_name = "{country_name}",
-        start_year = {start_year}
-    )
-    '''
-    result = execute_r_function(r_code, "team_urls")
-    return str(result)
+    result = await run_blocking(execute_r_function, **_team_urls_call(country_name, start_year))
+    return result
 
 # Tool to get player URLs for a team
 @mcp.tool()
-def get_team_player_urls(team_url: str) -> str:
+async def get_team_player_urls(team_url: str) -> dict:
     """
     Get player URLs for a specific team from Transfermarkt.
     
@@ -142,6 +384,7 @@ def get_team_player_urls(team_url: str) -> str:
     
     Returns:
         type: list | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
         glimpse: str | None # Glimpse of the data (the first 5 urls).
     """
@@ -150,12 +393,16 @@ def get_team_player_urls(team_url: str) -> str:
         team_url = "{team_url}"
     )
     '''
-    result = execute_r_function(r_code, "player_urls")
-    return str(result)
+    result = await run_blocking(
+        execute_r_function, r_code, "player_urls",
+        cache_key=("tm_team_player_urls", {"team_url": team_url}),
+        ttl=url_season_ttl(team_url)
+    )
+    return result
 
 # Tool to get staff URLs for a team
 @mcp.tool()
-def get_team_staff_urls(team_urls: str, staff_role: str) -> str:
+async def get_team_staff_urls(team_urls: str, staff_role: str) -> dict:
     """
     Get staff URLs for specific teams and staff role from Transfermarkt.
     
@@ -165,6 +412,7 @@ def get_team_staff_urls(team_urls: str, staff_role: str) -> str:
     
     Returns:
         type: list | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
         glimpse: str | None # Glimpse of the data (the first 5 urls).
     """
@@ -181,41 +429,64 @@ def get_team_staff_urls(team_urls: str, staff_role: str) -> str:
         staff_role = "{staff_role}"
     )
     '''
-    result = execute_r_function(r_code, "staff_urls")
-    return str(result)
+    result = await run_blocking(
+        execute_r_function, r_code, "staff_urls",
+        cache_key=("tm_team_staff_urls", {"team_urls": team_urls, "staff_role": staff_role})
+    )
+    return result
 
 # Tool to get league table by matchday
 @mcp.tool()
-def get_matchday_table(country_name: str, start_year: int, matchday: str, league_url: str = "") -> str:
+async def get_matchday_table(country_name: str, start_year: int, matchday: str, ctx: Context, league_url: str = "") -> dict:
     """
-    Get league table for specific matchday(s) from Transfermarkt.
+    Get league table for specific matchday(s) from Transfermarkt. Reports progress per matchday.
     
     Args:
         country_name: The name of the country (e.g., "England", "Spain")
         start_year: The starting year of the season (e.g., 2020 for the 2020-2021 season)
-        matchday: Matchday numbers (single number or range like "1:5")
+        matchday: Matchday numbers (single number, range like "1:5" or list like "1,3,5")
         league_url: Optional URL for leagues not in the standard dataset
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names. (Expected column names: \'country\', \'league\', \'matchday\', \'rk\', \'squad\', \'p\', \'w\', \'d\', \'l\', \'gf\', \'ga\', \'g_diff\', \'pts\')
+        errors: dict # Matchday -> error message, for the matchdays that failed.
+        partial: bool # True if the time budget ran out before every matchday was fetched.
+        pending: list # Matchdays still being fetched; call again to get them from the cache.
+    """
+    try:
+        matchdays = _parse_matchdays(matchday)
+    except ValueError:
+        return {"type": "error", "message": f"Invalid matchday '{matchday}', expected e.g. \"5\" or \"1:5\""}
+    calls = {m: _matchday_call(country_name, start_year, m, league_url) for m in matchdays}
+    result = await fan_out(calls, ctx)
+    return result
+
+def _parse_matchdays(matchday):
+    """ "5" -> [5], "1:5" -> [1, 2, 3, 4, 5], "1,3,5" -> [1, 3, 5] """
+    matchdays = []
+    for part in str(matchday).split(","):
+        if ":" in part:
+            start, end = part.split(":")
+            matchdays.extend(range(int(start), int(end) + 1))
+        else:
+            matchdays.append(int(part))
+    return sorted(set(matchdays))
+
+def _matchday_call(country_name, start_year, matchday, league_url):
+    """
+    One matchday of a league table. Each matchday is cached as its own result under (league,
+    season, matchday), so asking for "1:35" after "1:34" costs a single scrape.
     """
-    # Process matchday parameter 
-    if ":" in matchday:
-        start, end = matchday.split(":")
-        matchday_param = f"c({start}:{end})"
-    else:
-        matchday_param = matchday
-    
-    # Construct the R code based on whether league_url is provided
     if league_url:
         r_code = f'''
         table_data <- tm_matchday_table(
             start_year = {start_year},
-            matchday = {matchday_param},
+            matchday = {matchday},
             league_url = "{league_url}"
         )
         '''
@@ -224,18 +495,23 @@ def get_matchday_table(country_name: str, start_year: int, matchday: str, league
         table_data <- tm_matchday_table(
             country_name = "{country_name}",
             start_year = {start_year},
-            matchday = {matchday_param}
+            matchday = {matchday}
         )
         '''
-    
-    result = execute_r_function(r_code, "table_data")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="table_data",
+        cache_key=("tm_matchday_table", {
+            "country_name": country_name, "start_year": start_year,
+            "matchday": matchday, "league_url": league_url
+        }),
+        ttl=season_ttl(start_year)
+    )
 
 # Tool to get league debutants
 @mcp.tool()
-def get_league_debutants(country_name: str, debut_type: str, debut_start_year: int, debut_end_year: int, league_url: str = "") -> str:
+async def get_league_debutants(country_name: str, debut_type: str, debut_start_year: int, debut_end_year: int, ctx: Context, league_url: str = "") -> dict:
     """
-    Get league debutants from Transfermarkt.
+    Get league debutants from Transfermarkt. Reports progress per season.
     
     Args:
         country_name: The name of the country (e.g., "England", "Spain")
@@ -246,19 +522,32 @@ def get_league_debutants(country_name: str, debut_type: str, debut_start_year: i
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names Expected column names: \'comp_name\', \'country\', \'comp_url\', \'player_name\', \'player_url\', \'position\', \'nationality\', \'second_nationality\', \'debut_for\', \'debut_date\', \'opponent\', \'goals_for\', \'goals_against\', \'age_debut\', \'value_at_debut\', \'player_market_value\', \'appearances\', \'goals\', \'minutes_played\', \'debut_type\'
+        errors: dict # Season start year -> error message, for the seasons that failed.
+        partial: bool # True if the time budget ran out before every season was fetched.
+        pending: list # Seasons still being fetched; call again to get them from the cache.
     """
+    calls = {
+        year: _league_debutants_call(country_name, debut_type, year, league_url)
+        for year in range(debut_start_year, debut_end_year + 1)
+    }
+    result = await fan_out(calls, ctx)
+    return result
+
+def _league_debutants_call(country_name, debut_type, year, league_url):
+    """Debutants of one season, so that completed seasons are cached for good."""
     if league_url:
         r_code = f'''
         debutants <- tm_league_debutants(
             country_name = "{country_name}",
             league_url = "{league_url}",
             debut_type = "{debut_type}",
-            debut_start_year = {debut_start_year},
-            debut_end_year = {debut_end_year}
+            debut_start_year = {year},
+            debut_end_year = {year}
         )
         '''
     else:
@@ -266,17 +555,22 @@ def get_league_debutants(country_name: str, debut_type: str, debut_start_year: i
         debutants <- tm_league_debutants(
             country_name = "{country_name}",
             debut_type = "{debut_type}",
-            debut_start_year = {debut_start_year},
-            debut_end_year = {debut_end_year}
+            debut_start_year = {year},
+            debut_end_year = {year}
         )
         '''
-    
-    result = execute_r_function(r_code, "debutants")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="debutants",
+        cache_key=("tm_league_debutants", {
+            "country_name": country_name, "league_url": league_url, "debut_type": debut_type,
+            "debut_start_year": year, "debut_end_year": year
+        }),
+        ttl=season_ttl(year)
+    )
 
 # Tool to get expiring contracts
 @mcp.tool()
-def get_expiring_contracts(country_name: str, contract_end_year: int, league_url: str = "") -> str:
+async def get_expiring_contracts(country_name: str, contract_end_year: int, league_url: str = "") -> dict:
     """
     Get players with expiring contracts from Transfermarkt.
     
@@ -287,8 +581,9 @@ def get_expiring_contracts(country_name: str, contract_end_year: int, league_url
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names Expected column names: \'comp_name\', \'country\', \'comp_url\', \'player_name\', \'player_url\', \'date_of_birth\', \'position\', \'nationality\', \'second_nationality\', \'current_club\', \'contract_expiry\', \'contract_option\', \'player_market_value\', \'transfer_fee\', \'agent\'
     """
@@ -308,12 +603,38 @@ def get_expiring_contracts(country_name: str, contract_end_year: int, league_url
         )
         '''
     
-    result = execute_r_function(r_code, "expiring")
-    return str(result)
+    result = await run_blocking(
+        execute_r_function, r_code, "expiring",
+        cache_key=("tm_expiring_contracts", {
+            "country_name": country_name, "contract_end_year": contract_end_year,
+            "league_url": league_url
+        })
+    )
+    return result
+
+def _league_injuries_call(country_name, league_url):
+    if league_url:
+        r_code = f'''
+        injuries <- tm_league_injuries(
+            country_name = "{country_name}",
+            league_url = "{league_url}"
+        )
+        '''
+    else:
+        r_code = f'''
+        injuries <- tm_league_injuries(
+            country_name = "{country_name}"
+        )
+        '''
+    return dict(
+        r_code=r_code, var_name="injuries",
+        cache_key=("tm_league_injuries", {"country_name": country_name, "league_url": league_url}),
+        ttl=TTL_VOLATILE
+    )
 
 # Tool to get league injuries
 @mcp.tool()
-def get_league_injuries(country_name: str, league_url: str = "") -> str:
+async def get_league_injuries(country_name: str, league_url: str = "") -> dict:
     """
     Get current injuries in a league from Transfermarkt.
     
@@ -323,31 +644,31 @@ def get_league_injuries(country_name: str, league_url: str = "") -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'comp_name\', \'country\', \'comp_url\', \'player_name\', \'player_url\', \'position\', \'current_club\', \'age\', \'nationality\', \'second_nationality\', \'injury\', \'injured_since\', \'injured_until\', \'player_market_value\'
     """
-    if league_url:
-        r_code = f'''
-        injuries <- tm_league_injuries(
-            country_name = "{country_name}",
-            league_url = "{league_url}"
-        )
-        '''
-    else:
-        r_code = f'''
-        injuries <- tm_league_injuries(
-            country_name = "{country_name}"
-        )
-        '''
-    
-    result = execute_r_function(r_code, "injuries")
-    return str(result)
+    result = await run_blocking(execute_r_function, **_league_injuries_call(country_name, league_url))
+    return result
+
+def _team_transfers_call(team_url, transfer_window):
+    r_code = f'''
+    transfers <- tm_team_transfers(
+        team_url = "{team_url}",
+        transfer_window = "{transfer_window}"
+    )
+    '''
+    return dict(
+        r_code=r_code, var_name="transfers",
+        cache_key=("tm_team_transfers", {"team_url": team_url, "transfer_window": transfer_window}),
+        ttl=url_season_ttl(team_url)
+    )
 
 # Tool to get team transfers
 @mcp.tool()
-def get_team_transfers(team_url: str, transfer_window: str = "all") -> str:
+async def get_team_transfers(team_url: str, transfer_window: str = "all") -> dict:
     """
     Get transfer activity for a team from Transfermarkt.
     
@@ -357,24 +678,30 @@ def get_team_transfers(team_url: str, transfer_window: str = "all") -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'team_name\', \'league\', \'country\', \'season\', \'transfer_type\', \'player_name\', \'player_url\', \'player_position\', \'player_age\', \'player_nationality\', \'club_2\', \'league_2\', \'country_2\', \'transfer_fee\', \'is_loan\', \'transfer_notes\', \'window\', \'in_squad\', \'appearances\', \'goals\', \'minutes_played\'
     """
+    result = await run_blocking(execute_r_function, **_team_transfers_call(team_url, transfer_window))
+    return result
+
+def _squad_stats_call(team_url):
     r_code = f'''
-    transfers <- tm_team_transfers(
-        team_url = "{team_url}",
-        transfer_window = "{transfer_window}"
+    stats <- tm_squad_stats(
+        team_url = "{team_url}"
     )
     '''
-    
-    result = execute_r_function(r_code, "transfers")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="stats",
+        cache_key=("tm_squad_stats", {"team_url": team_url}),
+        ttl=url_season_ttl(team_url)
+    )
 
 # Tool to get squad stats
 @mcp.tool()
-def get_squad_stats(team_url: str) -> str:
+async def get_squad_stats(team_url: str) -> dict:
     """
     Get squad player statistics from Transfermarkt.
     
@@ -383,38 +710,73 @@ def get_squad_stats(team_url: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'team_name\', \'league\', \'country\', \'player_name\', \'player_url\', \'player_pos\', \'player_age\', \'nationality\', \'in_squad\', \'appearances\', \'goals\', \'minutes_played\'
     """
-    r_code = f'''
-    stats <- tm_squad_stats(
-        team_url = "{team_url}"
+    result = await run_blocking(execute_r_function, **_squad_stats_call(team_url))
+    return result
+
+# Tool to get team transfers for every club of a league
+@mcp.tool()
+async def get_league_team_transfers(country_name: str, start_year: int, ctx: Context, transfer_window: str = "all", league_url: str = "") -> dict:
+    """
+    Get the transfer activity of every team in a league and season from Transfermarkt in one call.
+    Prefer this over calling get_team_transfers once per team.
+
+    Args:
+        country_name: The name of the country (e.g., "England", "Spain")
+        start_year: The starting year of the season (e.g., 2020 for the 2020-2021 season)
+        transfer_window: Transfer window to get data for ("summer", "winter", or "all")
+        league_url: Optional URL for leagues not in the standard dataset
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every team.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # Same columns as get_team_transfers.
+        teams: int # Number of teams in the league.
+        errors: dict # Team URL -> error message, for the teams that failed.
+        partial: bool # True if the time budget ran out before every team was fetched.
+        pending: list # Team URLs still being fetched; call again to get them from the cache.
+    """
+    result = await league_fan_out(
+        country_name, start_year, league_url, lambda url: _team_transfers_call(url, transfer_window), ctx
     )
-    '''
-    
-    result = execute_r_function(r_code, "stats")
-    return str(result)
+    return result
 
-# Tool to get player market values
+# Tool to get squad stats for every club of a league
 @mcp.tool()
-def get_player_market_values(country_name: str, start_year: int, league_url: str = "") -> str:
+async def get_league_squad_stats(country_name: str, start_year: int, ctx: Context, league_url: str = "") -> dict:
     """
-    Get player market values for a league from Transfermarkt.
-    
+    Get squad player statistics of every team in a league and season from Transfermarkt in one call.
+    Prefer this over calling get_squad_stats once per team.
+
     Args:
         country_name: The name of the country (e.g., "England", "Spain")
-        start_year: The starting year of the season
+        start_year: The starting year of the season (e.g., 2020 for the 2020-2021 season)
         league_url: Optional URL for leagues not in the standard dataset
-    
+
     Returns:
         type: dataframe | error
-        file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every team.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
-        columns: list | None # List of column names, Expected column names: \'comp_name\', \'region\', \'country\', \'season_start_year\', \'squad\', \'player_num\', \'player_name\', \'player_position\', \'player_dob\', \'player_age\', \'player_nationality\', \'current_club\', \'player_height_mtrs\', \'player_foot\', \'date_joined\', \'joined_from\', \'contract_expiry\', \'player_market_value_euro\', \'player_url\'
+        columns: list | None # Same columns as get_squad_stats.
+        teams: int # Number of teams in the league.
+        errors: dict # Team URL -> error message, for the teams that failed.
+        partial: bool # True if the time budget ran out before every team was fetched.
+        pending: list # Team URLs still being fetched; call again to get them from the cache.
     """
+    result = await league_fan_out(country_name, start_year, league_url, _squad_stats_call, ctx)
+    return result
+
+def _player_market_values_call(country_name, start_year, league_url):
     if league_url:
         r_code = f'''
         values <- tm_player_market_values(
@@ -430,13 +792,50 @@ def get_player_market_values(country_name: str, start_year: int, league_url: str
             start_year = {start_year}
         )
         '''
+    return dict(
+        r_code=r_code, var_name="values",
+        cache_key=("tm_player_market_values", {
+            "country_name": country_name, "start_year": start_year, "league_url": league_url
+        }),
+        ttl=season_ttl(start_year)
+    )
+
+# Tool to get player market values
+@mcp.tool()
+async def get_player_market_values(country_name: str, start_year: int, league_url: str = "") -> dict:
+    """
+    Get player market values for a league from Transfermarkt.
+    
+    Args:
+        country_name: The name of the country (e.g., "England", "Spain")
+        start_year: The starting year of the season
+        league_url: Optional URL for leagues not in the standard dataset
     
-    result = execute_r_function(r_code, "values")
-    return str(result)
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the text file containing all the URLs.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # List of column names, Expected column names: \'comp_name\', \'region\', \'country\', \'season_start_year\', \'squad\', \'player_num\', \'player_name\', \'player_position\', \'player_dob\', \'player_age\', \'player_nationality\', \'current_club\', \'player_height_mtrs\', \'player_foot\', \'date_joined\', \'joined_from\', \'contract_expiry\', \'player_market_value_euro\', \'player_url\'
+    """
+    result = await run_blocking(execute_r_function, **_player_market_values_call(country_name, start_year, league_url))
+    return result
+
+def _player_bio_call(player_url):
+    r_code = f'''
+    bio <- tm_player_bio(
+        player_url = "{player_url}"
+    )
+    '''
+    return dict(
+        r_code=r_code, var_name="bio",
+        cache_key=("tm_player_bio", {"player_url": player_url})
+    )
 
 # Tool to get player bio
 @mcp.tool()
-def get_player_bio(player_url: str) -> str:
+async def get_player_bio(player_url: str) -> dict:
     """
     Get player biographical information from Transfermarkt.
     
@@ -445,23 +844,29 @@ def get_player_bio(player_url: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'player_name\', \'player_id\', \'citizenship\', \'position\', \'current_club\', \'joined\', \'contract_expires\', \'player_valuation\', \'max_player_valuation\', \'max_player_valuation_date\', \'squad_number\', \'URL\', \'picture_url\', \'date_of_birth\'
     """
+    result = await run_blocking(execute_r_function, **_player_bio_call(player_url))
+    return result
+
+def _player_injury_history_call(player_url):
     r_code = f'''
-    bio <- tm_player_bio(
-        player_url = "{player_url}"
+    injuries <- tm_player_injury_history(
+        player_urls = "{player_url}"
     )
     '''
-    
-    result = execute_r_function(r_code, "bio")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="injuries",
+        cache_key=("tm_player_injury_history", {"player_url": player_url})
+    )
 
 # Tool to get player injury history
 @mcp.tool()
-def get_player_injury_history(player_url: str) -> str:
+async def get_player_injury_history(player_url: str) -> dict:
     """
     Get player injury history from Transfermarkt.
     
@@ -470,23 +875,32 @@ def get_player_injury_history(player_url: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'player_name\', \'player_url\', \'season_injured\', \'injury\', \'injured_since\', \'injured_until\', \'duration\', \'games_missed\', \'club_missed_games_for\
     """
+    result = await run_blocking(execute_r_function, **_player_injury_history_call(player_url))
+    return result
+
+def _player_transfer_history_call(player_url, get_extra_info):
     r_code = f'''
-    injuries <- tm_player_injury_history(
-        player_urls = "{player_url}"
+    transfers <- tm_player_transfer_history(
+        player_urls = "{player_url}",
+        get_extra_info = {"TRUE" if get_extra_info else "FALSE"}
     )
     '''
-    
-    result = execute_r_function(r_code, "injuries")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="transfers",
+        cache_key=("tm_player_transfer_history", {
+            "player_url": player_url, "get_extra_info": get_extra_info
+        })
+    )
 
 # Tool to get player transfer history
 @mcp.tool()
-def get_player_transfer_history(player_url: str, get_extra_info: bool = True) -> str:
+async def get_player_transfer_history(player_url: str, get_extra_info: bool = True) -> dict:
     """
     Get player transfer history from Transfermarkt.
     
@@ -497,19 +911,23 @@ def get_player_transfer_history(player_url: str, get_extra_info: bool = True) ->
     Returns:
         Player transfer history data
     """
+    result = await run_blocking(execute_r_function, **_player_transfer_history_call(player_url, get_extra_info))
+    return result
+
+def _player_absence_call(player_url):
     r_code = f'''
-    transfers <- tm_player_transfer_history(
-        player_urls = "{player_url}",
-        get_extra_info = {"TRUE" if get_extra_info else "FALSE"}
+    absence <- tm_get_player_absence(
+        player_urls = "{player_url}"
     )
     '''
-    
-    result = execute_r_function(r_code, "transfers")
-    return str(result)
+    return dict(
+        r_code=r_code, var_name="absence",
+        cache_key=("tm_get_player_absence", {"player_url": player_url})
+    )
 
 # Tool to get player absence
 @mcp.tool()
-def get_player_absence(player_url: str) -> str:
+async def get_player_absence(player_url: str) -> dict:
     """
     Get player absence history from Transfermarkt.
     
@@ -518,23 +936,18 @@ def get_player_absence(player_url: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'player_name\', \'player_url\', \'season\', \'absence_suspension\', \'competition\', \'from\', \'until\', \'days\', \'games_missed\', \'club_missed\
     """
-    r_code = f'''
-    absence <- tm_get_player_absence(
-        player_urls = "{player_url}"
-    )
-    '''
-    
-    result = execute_r_function(r_code, "absence")
-    return str(result)
+    result = await run_blocking(execute_r_function, **_player_absence_call(player_url))
+    return result
 
 # Tool to get team staff history
 @mcp.tool()
-def get_team_staff_history(team_url: str, staff_role: str) -> str:
+async def get_team_staff_history(team_url: str, staff_role: str) -> dict:
     """
     Get history of staff members by role for a team from Transfermarkt.
     
@@ -544,8 +957,9 @@ def get_team_staff_history(team_url: str, staff_role: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names: \'team_name\', \'league\', \'country\', \'staff_role\', \'staff_name\', \'staff_url\', \'staff_dob\', \'staff_nationality\', \'staff_nationality_secondary\', \'appointed\', \'end_date\', \'days_in_post\', \'matches\', \'wins\', \'draws\', \'losses\', \'ppg\'
     """
@@ -556,12 +970,26 @@ def get_team_staff_history(team_url: str, staff_role: str) -> str:
     )
     '''
     
-    result = execute_r_function(r_code, "staff_history")
-    return str(result)
+    result = await run_blocking(
+        execute_r_function, r_code, "staff_history",
+        cache_key=("tm_team_staff_history", {"team_url": team_url, "staff_role": staff_role})
+    )
+    return result
+
+def _staff_job_history_call(staff_url):
+    r_code = f'''
+    job_history <- tm_staff_job_history(
+        staff_urls = "{staff_url}"
+    )
+    '''
+    return dict(
+        r_code=r_code, var_name="job_history",
+        cache_key=("tm_staff_job_history", {"staff_url": staff_url})
+    )
 
 # Tool to get staff job history
 @mcp.tool()
-def get_staff_job_history(staff_url: str) -> str:
+async def get_staff_job_history(staff_url: str) -> dict:
     """
     Get job history for a staff member from Transfermarkt.
     
@@ -570,37 +998,139 @@ def get_staff_job_history(staff_url: str) -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names:  \'name\', \'current_club\', \'current_role\', \'date_of_birth\', \'citizenship\', \'coaching_licence\', \'avg_term_as_coach\', \'position\', \'club\', \'appointed\', \'contract_expiry\', \'days_in_charge\', \'matches\', \'wins\', \'draws\', \'losses\', \'players_used\', \'avg_goals_for\', \'avg_goals_against\', \'ppm\', \'staff_url\'
     """
-    r_code = f'''
-    job_history <- tm_staff_job_history(
-        staff_urls = "{staff_url}"
-    )
-    '''
-    
-    result = execute_r_function(r_code, "job_history")
-    return str(result)
+    result = await run_blocking(execute_r_function, **_staff_job_history_call(staff_url))
+    return result
 
-# Tool to get player suspensions
+# Tool to get player bios for many players
 @mcp.tool()
-def get_suspensions(country_name: str = "", league_url: str = "") -> str:
+async def get_player_bio_batch(player_urls: list[str], ctx: Context) -> dict:
     """
-    Get player suspensions in a league from Transfermarkt.
-    
+    Get biographical information for several players from Transfermarkt in one call.
+    Prefer this over calling get_player_bio once per player.
+
     Args:
-        country_name: The name of the country
-        league_url: Optional URL for the league
-    
+        player_urls: The URLs of the players' pages on Transfermarkt
+
     Returns:
         type: dataframe | error
-        file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every URL.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
-        columns: list | None # List of column names, Expected column names:  \'Country\', \'Competition\', \'Player\', \'Position\', \'Club\', \'Age\', \'Reason\', \'Since\', \'Until\', \'Matches_Missed\'
+        columns: list | None # Same columns as the single-URL tool.
+        errors: dict # URL -> error message, for the URLs that failed.
+        partial: bool # True if the time budget ran out before every URL was fetched.
+        pending: list # URLs still being fetched; call again to get them from the cache.
+    """
+    result = await fan_out({url: _player_bio_call(url) for url in player_urls}, ctx)
+    return result
+
+# Tool to get injury histories for many players
+@mcp.tool()
+async def get_player_injury_history_batch(player_urls: list[str], ctx: Context) -> dict:
+    """
+    Get the injury history of several players from Transfermarkt in one call.
+    Prefer this over calling get_player_injury_history once per player.
+
+    Args:
+        player_urls: The URLs of the players' pages on Transfermarkt
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every URL.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # Same columns as the single-URL tool.
+        errors: dict # URL -> error message, for the URLs that failed.
+        partial: bool # True if the time budget ran out before every URL was fetched.
+        pending: list # URLs still being fetched; call again to get them from the cache.
+    """
+    result = await fan_out({url: _player_injury_history_call(url) for url in player_urls}, ctx)
+    return result
+
+# Tool to get transfer histories for many players
+@mcp.tool()
+async def get_player_transfer_history_batch(player_urls: list[str], ctx: Context, get_extra_info: bool = True) -> dict:
+    """
+    Get the transfer history of several players from Transfermarkt in one call.
+    Prefer this over calling get_player_transfer_history once per player.
+
+    Args:
+        player_urls: The URLs of the players' pages on Transfermarkt
+        get_extra_info: Whether to get extra information about transfers
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every URL.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # Same columns as the single-URL tool.
+        errors: dict # URL -> error message, for the URLs that failed.
+        partial: bool # True if the time budget ran out before every URL was fetched.
+        pending: list # URLs still being fetched; call again to get them from the cache.
+    """
+    result = await fan_out({
+        url: _player_transfer_history_call(url, get_extra_info) for url in player_urls
+    }, ctx)
+    return result
+
+# Tool to get absences for many players
+@mcp.tool()
+async def get_player_absence_batch(player_urls: list[str], ctx: Context) -> dict:
     """
+    Get the absence history of several players from Transfermarkt in one call.
+    Prefer this over calling get_player_absence once per player.
+
+    Args:
+        player_urls: The URLs of the players' pages on Transfermarkt
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every URL.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # Same columns as the single-URL tool.
+        errors: dict # URL -> error message, for the URLs that failed.
+        partial: bool # True if the time budget ran out before every URL was fetched.
+        pending: list # URLs still being fetched; call again to get them from the cache.
+    """
+    result = await fan_out({url: _player_absence_call(url) for url in player_urls}, ctx)
+    return result
+
+# Tool to get job histories for many staff members
+@mcp.tool()
+async def get_staff_job_history_batch(staff_urls: list[str], ctx: Context) -> dict:
+    """
+    Get the job history of several staff members from Transfermarkt in one call.
+    Prefer this over calling get_staff_job_history once per staff member.
+
+    Args:
+        staff_urls: The URLs of the staff members' pages on Transfermarkt
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the Parquet file with the rows of every URL.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # Same columns as the single-URL tool.
+        errors: dict # URL -> error message, for the URLs that failed.
+        partial: bool # True if the time budget ran out before every URL was fetched.
+        pending: list # URLs still being fetched; call again to get them from the cache.
+    """
+    result = await fan_out({url: _staff_job_history_call(url) for url in staff_urls}, ctx)
+    return result
+
+def _suspensions_call(country_name, league_url):
     if league_url:
         r_code = f'''
         suspensions <- tm_get_suspensions(
@@ -613,13 +1143,36 @@ def get_suspensions(country_name: str = "", league_url: str = "") -> str:
             country_name = "{country_name}"
         )
         '''
+    return dict(
+        r_code=r_code, var_name="suspensions",
+        cache_key=("tm_get_suspensions", {"country_name": country_name, "league_url": league_url}),
+        ttl=TTL_VOLATILE
+    )
+
+# Tool to get player suspensions
+@mcp.tool()
+async def get_suspensions(country_name: str = "", league_url: str = "") -> dict:
+    """
+    Get player suspensions in a league from Transfermarkt.
+    
+    Args:
+        country_name: The name of the country
+        league_url: Optional URL for the league
     
-    result = execute_r_function(r_code, "suspensions")
-    return str(result)
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
+        file: str | None # Path to the text file containing all the URLs.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
+        shape: str | None # Shape of the dataframe.
+        columns: list | None # List of column names, Expected column names:  \'Country\', \'Competition\', \'Player\', \'Position\', \'Club\', \'Age\', \'Reason\', \'Since\', \'Until\', \'Matches_Missed\'
+    """
+    result = await run_blocking(execute_r_function, **_suspensions_call(country_name, league_url))
+    return result
 
 # Tool to get players at risk of suspension
 @mcp.tool()
-def get_risk_of_suspension(country_name: str = "", league_url: str = "") -> str:
+async def get_risk_of_suspension(country_name: str = "", league_url: str = "") -> dict:
     """
     Get players at risk of suspension in a league from Transfermarkt.
     
@@ -629,8 +1182,9 @@ def get_risk_of_suspension(country_name: str = "", league_url: str = "") -> str:
     
     Returns:
         type: dataframe | error
+        handle: str | None # Opaque id of the stored result.
         file: str | None # Path to the text file containing all the URLs.
-        glimpse: Returns a glimpse showing number of rows and columns and a glimpse of the data.
+        profile: str | None # Per-column dtype, null count, min/max/mean of numbers and money values, top values of categories.
         shape: str | None # Shape of the dataframe.
         columns: list | None # List of column names, Expected column names:  \'Country\', \'Competition\', \'Player\', \'Position\', \'Club\', \'Age\', \'Yellow_Cards\'
     """
@@ -647,8 +1201,184 @@ def get_risk_of_suspension(country_name: str = "", league_url: str = "") -> str:
         )
         '''
     
-    result = execute_r_function(r_code, "risk")
-    return str(result)
+    result = await run_blocking(
+        execute_r_function, r_code, "risk",
+        cache_key=("tm_get_risk_of_suspension", {
+            "country_name": country_name, "league_url": league_url
+        }),
+        ttl=TTL_VOLATILE
+    )
+    return result
+
+# Tool to query stored results with SQL
+@mcp.tool()
+async def query_results(sql: str, max_rows: int = 50) -> dict:
+    """
+    Run a SQL query (DuckDB dialect) over results returned by the other tools.
+    Use a result's `handle` (e.g. t_3f2a9c0d1e2b4a5c) as its table name; URL lists are tables with
+    a single `value` column. Prefer this over execute_python_code to filter, join or aggregate results.
+
+    Args:
+        sql: The query, e.g. "SELECT squad, SUM(player_market_value_euro) AS value FROM t_3f2a9c0d1e2b4a5c GROUP BY squad"
+        max_rows: Number of rows returned inline (at most 500). The full result is stored under its own handle.
+
+    Returns:
+        type: dataframe | error
+        handle: str | None # Opaque id of the stored full result.
+        file: str | None # Path to the Parquet file with the full result.
+        profile: str | None # Per-column profile of the full result.
+        shape: str | None # Shape of the full result.
+        columns: list | None # List of column names.
+        rows: str | None # The first max_rows rows as CSV.
+        truncated: bool | None # Whether the full result has more rows than returned inline.
+    """
+    return await run_blocking(_query_results, sql, max(1, min(max_rows, 500)))
+
+def _query_results(sql, max_rows):
+    try:
+        df = query_artifacts(sql, store.resolve)
+    except Exception as e:
+        return {"type": "error", "message": str(e)}
+    result = store_dataframe(df)
+    result["rows"] = df.head(max_rows).to_csv(index=False)
+    result["truncated"] = len(df) > max_rows
+    metrics.inc("tm_rows_returned_total", min(len(df), max_rows), tool="query_results")
+    return result
+
+# Tool to page through a stored result
+@mcp.tool()
+async def fetch_rows(handle: str, offset: int = 0, limit: int = 20, columns: list[str] = [],
+                     sort_by: str = "", descending: bool = False) -> dict:
+    """
+    Read rows of a stored result by its handle, optionally only some columns and sorted.
+    Use this to look at the data instead of writing code.
+
+    Args:
+        handle: The `handle` of a result returned by another tool
+        offset: Index of the first row to return
+        limit: Maximum number of rows to return
+        columns: Columns to return (all when empty). URL lists have a single `value` column.
+        sort_by: Optional column to sort by before paging
+        descending: Sort in descending order
+
+    Returns:
+        type: rows | error
+        rows: str # The rows as CSV, cut off at the response byte budget.
+        returned: int # Number of rows in `rows`.
+        total_rows: int # Number of rows in the whole result.
+        next_offset: int | None # Offset of the next page, None at the end.
+    """
+    return await run_blocking(_fetch_rows, handle, offset, limit, columns, sort_by, descending)
+
+def _fetch_rows(handle, offset, limit, columns, sort_by, descending):
+    path = store.resolve(handle)
+    if path is None:
+        return {"type": "error", "message": f"Unknown or evicted handle '{handle}'"}
+    try:
+        page = read_rows(
+            path, offset=max(offset, 0), limit=max(limit, 0), columns=columns,
+            sort_by=sort_by or None, descending=descending, max_bytes=FETCH_MAX_BYTES
+        )
+    except Exception as e:
+        return {"type": "error", "message": str(e)}
+    metrics.inc("tm_rows_returned_total", page["returned"], tool="fetch_rows")
+    return {"type": "rows", **page}
+
+# Tool to find the URL of a team, player or staff member by name
+@mcp.tool()
+async def resolve_entity(name: str, kind: str = "", limit: int = 5) -> dict:
+    """
+    Find Transfermarkt URLs by name among the teams, players and staff of previously fetched results
+    (URL lists and market value tables). Matching ignores case and accents and tolerates typos.
+    Try this before walking get_team_urls -> get_team_player_urls to find a single URL.
+
+    Args:
+        name: The name to look up (e.g., "Haaland", "Burnley", "Odegaard")
+        kind: Optional filter: "team", "player" or "staff"
+        limit: Maximum number of candidates to return
+
+    Returns:
+        type: candidates | error
+        candidates: list[dict] # name, kind, url and score (1.0 is an exact name match), best first.
+        indexed: dict # Number of indexed entities per kind. Fetch the league's URL lists when nothing matches.
+    """
+    if kind and kind not in ("team", "player", "staff"):
+        return {"type": "error", "message": f"Unknown kind '{kind}', use team, player or staff"}
+    candidates = await run_blocking(entities.search, name, kind or None, max(limit, 1))
+    return {"type": "candidates", "candidates": candidates, "indexed": entities.stats()}
+
+# Tool to inspect the result cache
+@mcp.tool()
+def get_cache_stats() -> dict:
+    """
+    Get hit/miss counters of the server's result cache, request coalescing, the rate limiter and the artifact store.
+
+    Returns:
+        hits: int # Tool calls answered from the cache.
+        misses: int # Tool calls that had to run the scraper.
+        hit_ratio: float
+        entries: int # Results currently stored.
+        coalescing: dict # Calls that ran (leaders), calls that waited on an identical running call (coalesced), calls running now.
+        rate_limits: dict # Current request rate and available tokens per throttled host.
+        artifact_store: dict # Number and bytes of stored results, deduplicated writes and evictions.
+        prefetch: dict # Background refreshes run and failed, and when the last pass finished.
+        http_mode: str # live, record or replay.
+        cassette: dict # Recorded responses and their raw and compressed bytes (record and replay modes only).
+    """
+    stats = {
+        **cache.stats(),
+        "coalescing": in_flight.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "artifact_store": store.stats(),
+        "prefetch": prefetcher.stats(),
+        "http_mode": HTTP_MODE
+    }
+    if HTTP_MODE != "live":
+        stats["cassette"] = Cassette(cassette_path()).stats()
+    return stats
+
+# Tool to inspect latency and resource metrics
+@mcp.tool()
+def server_stats() -> dict:
+    """
+    Get per-tool and per-stage latency, error and volume metrics of this server since it started.
+    The same metrics are written in Prometheus text format to TM_METRICS_FILE.
+
+    Returns:
+        tools: dict # Per tool: calls, errors, error_rate, latency (mean_s, total_s, p50_s/p95_s as histogram bucket bounds), response_bytes.
+        stages: dict # Per stage (cache_lookup, r_worker, rate_limit_wait, r_eval, convert, write, profile, store): count and latency.
+        http_requests: dict # Requests made by the scraper per R function.
+        rows: dict # Rows scraped per R function and rows returned by fetch_rows/query_results.
+        bytes_written: dict # Bytes written to the artifact store per result kind.
+        cache: dict # Hits, misses, hit_ratio and entries of the result cache.
+        metrics_file: str # Path of the Prometheus text dump.
+    """
+    calls = metrics.counters("tm_tool_calls_total", "tool")
+    errors = metrics.counters("tm_tool_errors_total", "tool")
+    response_bytes = metrics.counters("tm_tool_response_bytes_total", "tool")
+    tools = {
+        tool: {
+            "calls": latency.pop("count"),
+            "errors": errors.get(tool, 0),
+            "error_rate": round(errors.get(tool, 0) / calls[tool], 3) if calls.get(tool) else 0.0,
+            **latency,
+            "response_bytes": response_bytes.get(tool, 0),
+        }
+        for tool, latency in metrics.histograms("tm_tool_duration_seconds", "tool").items()
+    }
+    metrics.dump(gauges=metric_gauges(), force=True)
+    return {
+        "tools": tools,
+        "stages": metrics.histograms("tm_stage_duration_seconds", "stage"),
+        "http_requests": metrics.counters("tm_http_requests_total", "r_function"),
+        "rows": {
+            "scraped": metrics.counters("tm_result_rows_total", "r_function"),
+            "returned": metrics.counters("tm_rows_returned_total", "tool"),
+        },
+        "bytes_written": metrics.counters("tm_artifact_bytes_written_total", "kind"),
+        "cache": cache.stats(),
+        "metrics_file": metrics.dump_path,
+    }
 
 # Tool for running custom R code
 # @mcp.tool()
@@ -665,15 +1395,45 @@ def get_risk_of_suspension(country_name: str = "", league_url: str = "") -> str:
 #     result = execute_r_function(r_code)
 #     return str(result)
 
+# One analysis kernel per client session, so variables and loaded results survive between calls
+kernels = weakref.WeakKeyDictionary()
+_default_kernel = None
+
+def new_kernel():
+    kernel = AnalysisKernel(store.resolve)
+    try:
+        # rpy2 is optional here: R itself runs in the worker processes
+        import rpy2.robjects as robjects
+        kernel.namespace["robjects"] = robjects
+    except ImportError:
+        pass
+    return kernel
+
+def kernel_for(ctx):
+    global _default_kernel
+    try:
+        session = ctx.session
+    except ValueError:
+        # Called outside of an MCP request (e.g. from a benchmark)
+        session = None
+    if session is None:
+        if _default_kernel is None:
+            _default_kernel = new_kernel()
+        return _default_kernel
+    if session not in kernels:
+        kernels[session] = new_kernel()
+    return kernels[session]
+
 # # Tool for executing Python code to manipulate stored data
 @mcp.tool()
-def execute_python_code(python_code: str) -> str:
+async def execute_python_code(python_code: str, ctx: Context) -> str | dict:
     """
-    Execute Python code to manipulate dataframes and lists stored on the computer.
-    Write code into `intermediate_result.txt` file.
+    Execute Python code to manipulate dataframes and lists returned by the other tools.
+    Write the result to the file at the path in the `result_file` variable, e.g. `open(result_file, "w").write(...)`.
     Note:
-        - For dataframes, use encoding="ISO-8859-1" when reading CSV files.
-        - For lists, use `f.readlines()` to read the file content.
+        - Every result is available by its `handle` as a variable: dataframes as pandas DataFrames,
+          lists as lists of strings (e.g. `t_3f2a9c0d1e2b4a5c.head()`). Do not re-read the files.
+        - Variables persist between calls in the same session; use evict_python_variables to free memory.
     
     Args:
         python_code: The Python code to execute
@@ -681,34 +1441,91 @@ def execute_python_code(python_code: str) -> str:
     Returns:
         Result of the Python code execution
     """
+    return await run_blocking(_execute_python_code, python_code, kernel_for(ctx))
+
+def _execute_python_code(python_code, kernel):
     try:
-        # Create a local namespace with common imports
-        local_namespace = {
-            'pd': pd,
-            'os': os,
-            'time': time,
-            'robjects': robjects,
-        }
-        
-        with open(f"r_result_pythoncode_{time.time()}.py", "w") as f:
-            f.write(python_code)
-
-        # Execute the code
-        exec(python_code, {}, local_namespace)
-        
-        # Check if the code defines a 'result' variable
-        if os.path.exists("intermediate_result.txt"):
-            with open("intermediate_result.txt", "r") as f:
-                result = f.read()
-            os.remove("intermediate_result.txt")
+        store.put_bytes(python_code.encode("utf-8"), ".py", kind="code")
+
+        # Execute the code; it writes its result to the session's own result_file
+        result = kernel.run(python_code)
+        if result is not None:
             return "Result of the execution: " + result
         else:
-            return "Code executed successfully, but no explicit result was returned, Create a file named `intermediate_result.txt` to store the result."
+            return "Code executed successfully, but no explicit result was returned, Write the result to the file at `result_file` to return it."
     except Exception as e:
-        return f"Error executing Python code: {str(e)}\n{traceback.format_exc()}"
+        return {"type": "error", "message": f"Error executing Python code: {e}", "traceback": traceback.format_exc()}
+
+# Tool to free memory held by the analysis kernel
+@mcp.tool()
+async def evict_python_variables(ctx: Context, names: list[str] = []) -> dict:
+    """
+    Remove variables from the persistent execute_python_code namespace of this session.
+
+    Args:
+        names: Variable names to remove. When empty, every loaded tool result is removed
+            (they are reloaded automatically when referenced again).
+
+    Returns:
+        removed: list # Names that were removed.
+        variables: dict # Remaining dataframe/list variables and their size in bytes.
+        bytes: int # Memory held by the dataframe/list variables.
+        loaded_bytes: int # Memory held by loaded tool results, measured when they were loaded.
+        max_bytes: int # Budget for loaded_bytes above which loaded results are evicted automatically.
+    """
+    kernel = kernel_for(ctx)
+    # Both wait for a running cell, which must not block the event loop
+    return await run_blocking(lambda: {"removed": kernel.evict(names), **kernel.stats()})
+
+def prefetch_calls():
+    """The league-wide results kept warm for the configured leagues, in the current season (built every pass)."""
+    leagues = [c.strip() for c in os.getenv("TM_PREFETCH_LEAGUES", "England,Spain,Germany,Italy,France").split(",")]
+    season = current_season_start_year()
+    calls = {}
+    for country in filter(None, leagues):
+        calls[f"get_team_urls:{country}"] = _team_urls_call(country, season)
+        calls[f"get_player_market_values:{country}"] = _player_market_values_call(country, season, "")
+        calls[f"get_league_injuries:{country}"] = _league_injuries_call(country, "")
+        calls[f"get_suspensions:{country}"] = _suspensions_call(country, "")
+    return calls
+
+prefetcher = PrefetchScheduler(
+    build_calls=prefetch_calls,
+    execute=execute_r_function,
+    cache=cache,
+    is_idle=lambda: active_calls == 0,
+    interval=float(os.getenv("TM_PREFETCH_INTERVAL", 300)),
+    concurrency=int(os.getenv("TM_PREFETCH_CONCURRENCY", 2))
+)
+
+def log_startup(stage, started):
+    print(f"startup: {stage} took {time.perf_counter() - started:.2f}s", file=sys.stderr)
 
 # Run the server
 if __name__ == "__main__":
-    # Initialize R when the server starts
+    parser = argparse.ArgumentParser(description="WorldFootballR MCP server")
+    parser.add_argument("--install-r-packages", action="store_true",
+                        help="Install the R packages pinned in the lockfile, then exit")
+    parser.add_argument("--upgrade-r-packages", action="store_true",
+                        help="Install the latest worldfootballR, rewrite the lockfile, then exit")
+    args = parser.parse_args()
+    if args.install_r_packages or args.upgrade_r_packages:
+        import r_packages
+        lock = r_packages.upgrade() if args.upgrade_r_packages else r_packages.install()
+        print(f"worldfootballR {lock['packages']['worldfootballR']['version']} installed, lockfile: {r_packages.LOCKFILE}")
+        sys.exit(0)
+
+    log_startup("imports", STARTED)
+    # Check the R library when the server starts
+    started = time.perf_counter()
     initialize_r()
-    mcp.run()
\ No newline at end of file
+    log_startup("R library check", started)
+    # Start the R workers now so they load worldfootballR while the client connects
+    started = time.perf_counter()
+    get_worker_pool(rate_limiter)
+    log_startup("worker spawn", started)
+    # Replayed load tests should only run the calls they make themselves
+    if prefetch_calls() and HTTP_MODE != "replay":
+        prefetcher.start()
+    log_startup("total", STARTED)
+    mcp.run()
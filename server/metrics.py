@@ -0,0 +1,137 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets, from cache hits to full-season scrapes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if it is above the last bucket)."""
+        rank, seen = q * self.count, 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """In-process counters and latency histograms, exported as a dict or in Prometheus text format.
+
+    Series are identified by a metric name plus keyword labels, e.g.
+    `metrics.observe("tm_stage_duration_seconds", 0.2, stage="r_eval")`.
+    """
+
+    def __init__(self, dump_path=None, dump_interval=10.0):
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._last_dump = 0.0
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            key = (name, _labels(labels))
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            key = (name, _labels(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def histograms(self, name, label):
+        """{label value: summary} of the histograms of `name`."""
+        with self._lock:
+            series = [(dict(labels)[label], h) for (n, labels), h in self._histograms.items() if n == name]
+            return {
+                value: {
+                    "count": h.count,
+                    "mean_s": round(h.sum / h.count, 4),
+                    "p50_s": h.quantile(0.5),
+                    "p95_s": h.quantile(0.95),
+                    "total_s": round(h.sum, 3),
+                }
+                for value, h in series
+            }
+
+    def counters(self, name, label):
+        """{label value: count} of the counters of `name`."""
+        with self._lock:
+            return {dict(labels)[label]: value for (n, labels), value in self._counters.items() if n == name}
+
+    def prometheus(self, gauges=None):
+        """All series in the Prometheus text exposition format, plus optional {name: value} gauges."""
+        lines, typed = [], set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(name, "counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items()):
+                declare(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), h.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        for name, value in (gauges or {}).items():
+            declare(name, "gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, gauges=None, force=False):
+        """
+        Write the Prometheus text to `dump_path`, at most once per `dump_interval` unless forced.
+        Nothing is written when `dump_path` is empty.
+        """
+        now = time.monotonic()
+        if not self.dump_path or (not force and now - self._last_dump < self.dump_interval):
+            return
+        self._last_dump = now
+        os.makedirs(os.path.dirname(os.path.abspath(self.dump_path)), exist_ok=True)
+        temp_path = f"{self.dump_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.prometheus(gauges))
+        os.replace(temp_path, self.dump_path)
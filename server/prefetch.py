@@ -0,0 +1,69 @@
+import concurrent.futures
+import sys
+import threading
+import time
+
+
+class PrefetchScheduler:
+    """Keeps a set of results warm by refreshing them in the background.
+
+    Every `interval` seconds, starting one interval after start() so that the first tool calls
+    of a fresh server do not queue behind a pass, the scheduler asks `build_calls()` for the calls
+    to keep warm (so that e.g. the current season can roll over) and refreshes each one whose cached
+    result is missing or expires within the next two intervals. It only starts a refresh while the
+    server is idle (`is_idle()`), runs at most `concurrency` refreshes at once and goes through the
+    same execute path as tool calls, as background calls: their requests yield to tool calls at the
+    rate limiter.
+    """
+
+    def __init__(self, build_calls, execute, cache, is_idle, interval, concurrency):
+        self._build_calls = build_calls
+        self._execute = execute
+        self._cache = cache
+        self._is_idle = is_idle
+        self.interval = interval
+        self._slots = threading.Semaphore(concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="prefetch"
+        )
+        self.refreshed = 0
+        self.failed = 0
+        self.last_pass = None
+
+    def start(self):
+        threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True).start()
+
+    def _due(self, kwargs):
+        if kwargs.get("cache_key") is None:
+            return True
+        remaining = self._cache.remaining_ttl(*kwargs["cache_key"])
+        return remaining is None or remaining < 2 * self.interval
+
+    def _refresh(self, name, kwargs):
+        try:
+            result = self._execute(**kwargs, refresh=True, background=True)
+            if result["type"] == "error":
+                self.failed += 1
+                print(f"prefetch: {name} failed: {result.get('message')}", file=sys.stderr)
+            else:
+                self.refreshed += 1
+        finally:
+            self._slots.release()
+
+    def run_once(self):
+        for name, kwargs in self._build_calls().items():
+            if not self._due(kwargs):
+                continue
+            while not self._is_idle():
+                time.sleep(1)
+            self._slots.acquire()
+            self._executor.submit(self._refresh, name, kwargs)
+        self.last_pass = time.time()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
+
+    def stats(self):
+        return {"refreshed": self.refreshed, "failed": self.failed, "last_pass": self.last_pass}
@@ -0,0 +1,33 @@
+import duckdb
+
+from artifact_store import HANDLE_PATTERN
+
+
+def query_artifacts(sql, resolve):
+    """
+    Run a DuckDB query in which every artifact handle mentioned in `sql` is a table.
+
+    Parquet artifacts are exposed with their own columns, URL lists as a single `value` column.
+
+    Args:
+        sql: The query.
+        resolve: Function mapping a handle to its file path, or None if it does not exist.
+
+    Returns:
+        The query result as a pandas DataFrame.
+    """
+    con = duckdb.connect()
+    try:
+        for handle in sorted(set(HANDLE_PATTERN.findall(sql))):
+            path = resolve(handle)
+            if path is None:
+                raise ValueError(f"Unknown or evicted handle '{handle}'")
+            quoted = path.replace("'", "''")
+            if path.endswith(".parquet"):
+                source = f"read_parquet('{quoted}')"
+            else:
+                source = f"read_csv('{quoted}', header = false, columns = {{'value': 'VARCHAR'}})"
+            con.execute(f"CREATE VIEW {handle} AS SELECT * FROM {source}")
+        return con.execute(sql).fetch_df()
+    finally:
+        con.close()
@@ -0,0 +1,171 @@
+import json
+import os
+import sys
+
+import rpy2.robjects as robjects
+
+LOCKFILE = os.getenv(
+    "TM_R_LOCKFILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "r-packages.lock.json")
+)
+GITHUB_REPO = "JaseZiv/worldfootballR"
+
+# Reads DESCRIPTION files only, so checking does not load (or install) anything
+R_DESCRIBE = '''
+function(packages) {
+    fields <- c("Version", "RemoteType", "RemoteUsername", "RemoteRepo", "RemoteSha")
+    vapply(packages, function(p) {
+        d <- suppressWarnings(utils::packageDescription(p, fields = fields))
+        if (!is.list(d)) d <- as.list(setNames(rep(NA, length(fields)), fields))
+        paste(vapply(fields, function(f) if (is.na(d[[f]])) "" else d[[f]], ""), collapse = "\\t")
+    }, "")
+}
+'''
+
+# Dependencies needed to install a package from source
+DEPENDENCY_FIELDS = 'c("Depends", "Imports", "LinkingTo")'
+
+# worldfootballR and everything it needs, recursively, excluding base R
+R_LOCKED_PACKAGES = f'''
+local({{
+    base <- rownames(installed.packages(priority = "base"))
+    deps <- tools::package_dependencies(
+        "worldfootballR", db = installed.packages(), which = {DEPENDENCY_FIELDS}, recursive = TRUE
+    )[["worldfootballR"]]
+    c("worldfootballR", setdiff(deps, c(base, "R")))
+}})
+'''
+
+# Direct dependencies of each package, tab-separated, excluding base R
+R_DIRECT_DEPENDENCIES = f'''
+function(packages) {{
+    base <- rownames(installed.packages(priority = "base"))
+    deps <- tools::package_dependencies(packages, db = installed.packages(), which = {DEPENDENCY_FIELDS})
+    vapply(packages, function(p) paste(setdiff(deps[[p]], c(base, "R")), collapse = "\\t"), "")
+}}
+'''
+
+
+def _describe(packages):
+    values = robjects.r(R_DESCRIBE)(robjects.StrVector(packages))
+    described = {}
+    for package, value in zip(packages, values):
+        version, remote_type, user, repo, sha = value.split("\t")
+        if not version:
+            described[package] = None
+        elif remote_type == "github":
+            described[package] = {
+                "version": version, "source": "github", "repo": f"{user}/{repo}", "sha": sha
+            }
+        else:
+            described[package] = {"version": version, "source": "cran"}
+    return described
+
+
+def install_order(packages):
+    """Names of the locked packages, each one after the locked packages it depends on."""
+    order, seen = [], set()
+
+    def visit(package):
+        if package in seen:
+            return
+        seen.add(package)
+        for dependency in packages[package].get("depends", []):
+            if dependency in packages:
+                visit(dependency)
+        order.append(package)
+
+    for package in sorted(packages):
+        visit(package)
+    return order
+
+
+def load_lockfile(path=LOCKFILE):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_installed(path=LOCKFILE):
+    """
+    Compare the installed R library with the lockfile.
+
+    Returns:
+        A list of human readable problems, empty when every locked package is installed
+        at its locked version.
+    """
+    lock = load_lockfile(path)
+    if lock is None:
+        return [f"No R lockfile at {path}"]
+    installed = _describe(list(lock["packages"]))
+    problems = []
+    for package, wanted in lock["packages"].items():
+        have = installed[package]
+        if have is None:
+            problems.append(f"{package} is not installed")
+        elif have["version"] != wanted["version"] or have.get("sha") != wanted.get("sha"):
+            problems.append(f"{package} {have['version']} is installed, lockfile wants {wanted['version']}")
+    return problems
+
+
+def write_lockfile(path=LOCKFILE):
+    packages = list(robjects.r(R_LOCKED_PACKAGES))
+    described = _describe(packages)
+    depends = robjects.r(R_DIRECT_DEPENDENCIES)(robjects.StrVector(packages))
+    for package, value in zip(packages, depends):
+        described[package]["depends"] = sorted(filter(None, value.split("\t")))
+    lock = {
+        "R": str(robjects.r('paste(R.version$major, R.version$minor, sep = ".")')[0]),
+        "packages": {package: described[package] for package in install_order(described)},
+    }
+    with open(path, "w") as f:
+        json.dump(lock, f, indent=2)
+        f.write("\n")
+    return lock
+
+
+def _ensure_remotes():
+    robjects.r('''
+    if (!requireNamespace("remotes", quietly = TRUE)) {
+        install.packages("remotes", repos = "https://cloud.r-project.org")
+    }
+    ''')
+
+
+def install(path=LOCKFILE):
+    """
+    Install the locked versions of the packages that are missing or differ, dependencies
+    first, since each one is installed without its dependencies.
+
+    Without a lockfile (a fresh checkout), install the latest worldfootballR and write one,
+    as upgrade() does.
+    """
+    lock = load_lockfile(path)
+    if lock is None:
+        print(f"No R lockfile at {path}, installing the latest worldfootballR and writing one", file=sys.stderr)
+        return upgrade(path)
+    _ensure_remotes()
+    installed = _describe(list(lock["packages"]))
+    for package in install_order(lock["packages"]):
+        wanted = lock["packages"][package]
+        have = installed[package]
+        if have is not None and have["version"] == wanted["version"] and have.get("sha") == wanted.get("sha"):
+            continue
+        if wanted["source"] == "github":
+            robjects.r(
+                f'remotes::install_github("{wanted["repo"]}", ref = "{wanted["sha"]}", '
+                f'upgrade = "never", dependencies = FALSE)'
+            )
+        else:
+            robjects.r(
+                f'remotes::install_version("{package}", version = "{wanted["version"]}", '
+                f'repos = "https://cloud.r-project.org", upgrade = "never", dependencies = FALSE)'
+            )
+    return lock
+
+
+def upgrade(path=LOCKFILE):
+    """Install the latest worldfootballR from GitHub and record the result in the lockfile."""
+    _ensure_remotes()
+    robjects.r(f'remotes::install_github("{GITHUB_REPO}", upgrade = "always")')
+    return write_lockfile(path)
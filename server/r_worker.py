@@ -0,0 +1,370 @@
+import contextlib
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+import pandas as pd
+from multiprocessing.connection import Connection
+
+from artifact_store import staging_path
+from cassette import Cassette, cassette_path, http_mode
+from results import dataframe_summary
+from tracing import Tracer
+
+# Set inside each worker process by worker_main: the connection to the server, which owns the rate limiter
+_conn = None
+cassette = None
+
+# rpy2 (and with it an embedded R) is only imported by worker_main, so that the server and the
+# benchmark's python stub can import this module on machines without R
+robjects = rinterface = default_converter = pandas2ri = localconverter = None
+
+def _import_rpy2():
+    global robjects, rinterface, default_converter, pandas2ri, localconverter
+    import rpy2.robjects as robjects
+    import rpy2.rinterface as rinterface
+    from rpy2.robjects import default_converter, pandas2ri
+    from rpy2.robjects.conversion import localconverter
+
+# Seconds spent in each stage of the current job (and its HTTP request count), sent back with the result
+stage_times = {}
+
+# Spans of the jobs, children of the caller's span that is sent along with each job
+tracer = Tracer(os.getenv("TM_TRACE_FILE"), service="r_worker")
+
+# Start of the request to each URL, between its before and after hook
+_request_started = {}
+
+@contextlib.contextmanager
+def _stage(name):
+    """Time a stage of the current job (sent back with the result) and record it as a span."""
+    started = time.perf_counter()
+    with tracer.span(name):
+        yield
+    stage_times[name] = stage_times.get(name, 0.0) + time.perf_counter() - started
+
+# Wraps the HTTP entry points used by worldfootballR (in every namespace holding a copy)
+# so each request to a URL first takes a token from the rate limiter and reports back
+# whether the site throttled it. In record mode the response is also stored in the
+# cassette; in replay mode it comes from the cassette instead of the network.
+R_HTTP_HOOKS = '''
+.tm_record <- function(fun_name, url, response) {
+    if (inherits(response, "response")) {
+        content_type <- httr::headers(response)[["content-type"]]
+        .tm_cassette_put(fun_name, url, response$status_code,
+                         if (is.null(content_type)) "" else content_type,
+                         httr::content(response, as = "raw"))
+    } else {
+        .tm_cassette_put(fun_name, url, 200L, "text/html; charset=utf-8",
+                         charToRaw(enc2utf8(as.character(response))))
+    }
+}
+.tm_replay <- function(fun_name, url, original) {
+    recorded <- .tm_cassette_get(fun_name, url)
+    if (is.null(recorded)) stop("No recorded response for ", url, " (TM_HTTP_MODE=replay)")
+    if (fun_name == "read_html") return(original(rawToChar(recorded$body), encoding = "UTF-8"))
+    structure(list(
+        url = url, status_code = recorded$status,
+        headers = structure(list(`content-type` = recorded$content_type), class = c("insensitive", "list")),
+        all_headers = list(), cookies = data.frame(), content = recorded$body,
+        date = Sys.time(), times = c(total = 0), request = NULL, handle = NULL
+    ), class = "response")
+}
+.tm_wrap_http <- function(ns_name, fun_name) {
+    if (!requireNamespace(ns_name, quietly = TRUE)) return(invisible(NULL))
+    original <- get(fun_name, envir = asNamespace(ns_name))
+    if (isTRUE(attr(original, "tm_wrapped"))) return(invisible(NULL))
+    wrapped <- function(...) {
+        url <- tryCatch(..1, error = function(e) NULL)
+        is_url <- is.character(url) && length(url) == 1 && grepl("^https?://", url)
+        if (is_url && .tm_http_mode == "replay") return(.tm_replay(fun_name, url, original))
+        if (is_url) .tm_before_request(url)
+        response <- tryCatch(original(...), error = function(e) {
+            if (is_url) .tm_after_request(url, conditionMessage(e))
+            stop(e)
+        })
+        if (is_url) {
+            status <- if (inherits(response, "response")) response$status_code else 200
+            .tm_after_request(url, as.character(status))
+            if (.tm_http_mode == "record") .tm_record(fun_name, url, response)
+        }
+        response
+    }
+    attr(wrapped, "tm_wrapped") <- TRUE
+    envs <- c(asNamespace(ns_name), lapply(loadedNamespaces(), function(ns) parent.env(asNamespace(ns))))
+    for (env in envs) {
+        if (exists(fun_name, envir = env, inherits = FALSE) &&
+            identical(get(fun_name, envir = env), original)) {
+            locked <- bindingIsLocked(fun_name, env)
+            if (locked) unlockBinding(fun_name, env)
+            assign(fun_name, wrapped, envir = env)
+            if (locked) lockBinding(fun_name, env)
+        }
+    }
+    invisible(NULL)
+}
+.tm_wrap_http("xml2", "read_html")
+.tm_wrap_http("httr", "GET")
+if (.tm_http_mode == "replay") {
+    # worldfootballR pauses between page requests; nothing to be polite to when replaying
+    unlockBinding("Sys.sleep", baseenv())
+    assign("Sys.sleep", function(time) invisible(NULL), envir = baseenv())
+    lockBinding("Sys.sleep", baseenv())
+}
+'''
+
+def _r_before_request(url):
+    started = time.time()
+    _conn.send(("before_request", str(url[0])))
+    waited = _conn.recv()
+    if waited:
+        tracer.add("rate_limit_wait", started, started + waited, url=str(url[0]))
+    stage_times["rate_limit_wait"] = stage_times.get("rate_limit_wait", 0.0) + waited
+    stage_times["http_requests"] = stage_times.get("http_requests", 0) + 1
+    _request_started[str(url[0])] = time.time()
+    return rinterface.NULL
+
+def _r_after_request(url, status):
+    _conn.send(("after_request", str(url[0]), str(status[0])))
+    started = _request_started.pop(str(url[0]), None)
+    if started is not None:
+        tracer.add("http", started, time.time(), url=str(url[0]), status=str(status[0]))
+    return rinterface.NULL
+
+def _r_cassette_get(fun_name, url):
+    started = time.time()
+    recorded = cassette.get(str(fun_name[0]), str(url[0]))
+    stage_times["http_requests"] = stage_times.get("http_requests", 0) + 1
+    tracer.add("http", started, time.time(), url=str(url[0]), replayed=recorded is not None)
+    if recorded is None:
+        return rinterface.NULL
+    return robjects.vectors.ListVector({
+        "status": robjects.IntVector([recorded["status"]]),
+        "content_type": robjects.StrVector([recorded["content_type"]]),
+        "body": robjects.vectors.ByteVector(recorded["body"]),
+    })
+
+def _r_cassette_put(fun_name, url, status, content_type, body):
+    cassette.put(str(fun_name[0]), str(url[0]), int(status[0]), str(content_type[0]), bytes(body))
+    return rinterface.NULL
+
+def install_http_hooks(mode="live"):
+    global cassette
+    if mode != "live":
+        cassette = Cassette(cassette_path())
+    robjects.globalenv[".tm_http_mode"] = robjects.StrVector([mode])
+    robjects.globalenv[".tm_before_request"] = rinterface.rternalize(_r_before_request)
+    robjects.globalenv[".tm_after_request"] = rinterface.rternalize(_r_after_request)
+    robjects.globalenv[".tm_cassette_get"] = rinterface.rternalize(_r_cassette_get)
+    robjects.globalenv[".tm_cassette_put"] = rinterface.rternalize(_r_cassette_put)
+    robjects.r(R_HTTP_HOOKS)
+
+def _to_pandas(r_df):
+    """Convert an R data frame in one pass, keeping column types and missing values."""
+    with localconverter(default_converter + pandas2ri.converter):
+        df = robjects.conversion.rpy2py(r_df)
+    classes = robjects.r('function(df) vapply(df, function(x) class(x)[1], "")')(r_df)
+    for column, r_class in zip(df.columns, classes):
+        if r_class == "Date":
+            # Dates arrive as days since the epoch
+            df[column] = pd.to_datetime(df[column], unit="D", origin="unix")
+        elif df[column].dtype == object:
+            df[column] = df[column].map(lambda v: None if v is rinterface.NA_Character else v)
+    return df.reset_index(drop=True)
+
+def _run_r_code(r_code, var_name=None):
+    # worldfootballR is already loaded by worker_main
+    with localconverter(default_converter):
+        # Execute the R code (its time excludes waiting for the rate limiter)
+        with _stage("r_eval"):
+            robjects.r(r_code)
+        stage_times["r_eval"] -= stage_times.get("rate_limit_wait", 0.0)
+        
+        # If variable name is provided, use it to reference the result
+        r_variable = var_name if var_name else "result"
+        
+        # Check if the variable exists in R environment
+        exists_check = robjects.r(f'exists("{r_variable}")')
+        if not exists_check[0]:
+            return {
+                "type": "error",
+                "message": f"Variable '{r_variable}' not found in R environment"
+            }
+        
+        # Get the result from R environment
+        result = robjects.r(r_variable)
+
+        if hasattr(result, 'nrow'):
+            with _stage("convert"):
+                df = _to_pandas(result)
+            return write_dataframe(df)
+        else:
+            return write_list(list(result))
+
+def write_dataframe(df):
+    """Stage a data frame result as Parquet and summarize it."""
+    with _stage("write"):
+        temp_file = staging_path(".parquet")
+        df.to_parquet(temp_file, index=False)
+    with _stage("profile"):
+        summary = dataframe_summary(df)
+    return {
+        "type": "dataframe",
+        "file": temp_file,
+        **summary
+    }
+
+def write_list(result_list):
+    """Stage a list result as a text file, one item per line."""
+    with _stage("write"):
+        file_path = staging_path(".txt")
+        with open(file_path, "w") as f:
+            for item in result_list:
+                f.write(str(item) + "\n")
+    return {
+        "type": "list",
+        "file": file_path,
+        "glimpse": str(result_list[:5] if len(result_list) > 5 else result_list)
+    }
+
+def worker_main(conn):
+    """
+    Entry point of an R worker process: load worldfootballR once (or run the prelude the pool
+    sends first instead, e.g. to define stubs of its functions), then serve jobs.
+    """
+    global _conn
+    _conn = conn
+    prelude = conn.recv()
+    started = time.perf_counter()
+    _import_rpy2()
+    robjects.r(prelude or 'library(worldfootballR)')
+    install_http_hooks(http_mode())
+    print(f"startup: R worker {os.getpid()} ready in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        r_code, var_name, trace = job
+        stage_times.clear()
+        try:
+            with tracer.span("r_job", parent=trace, pid=os.getpid()):
+                result = _run_r_code(r_code, var_name)
+        except Exception as e:
+            result = {
+                "type": "error",
+                "message": str(e),
+                "traceback": traceback.format_exc()
+            }
+        finally:
+            robjects.r(f'rm(list = intersect("{var_name or "result"}", ls()))')
+        result["timings"] = dict(stage_times)
+        conn.send(("result", result))
+
+
+class _Worker:
+    """
+    An R worker running `python r_worker.py <fd>`: a fresh interpreter that imports only this
+    module (multiprocessing's spawn would re-run the server script in every worker). Its
+    stdout goes to our stderr, since the server's stdout carries the MCP protocol.
+    """
+
+    def __init__(self, prelude=None):
+        parent_sock, child_sock = socket.socketpair()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(child_sock.fileno())],
+            pass_fds=[child_sock.fileno()], stdout=sys.stderr
+        )
+        child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.conn.send(prelude)
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class RWorkerPool:
+    """Pool of long-lived R processes with worldfootballR preloaded.
+
+    Calls take an idle worker from a queue, so independent calls run in parallel.
+    A worker that exceeds the timeout (or dies) is killed and replaced, which frees
+    the caller immediately instead of leaving a stuck thread behind.
+    """
+
+    def __init__(self, size, limiter, timeout, prelude=None):
+        self.timeout = timeout
+        self._limiter = limiter
+        self._prelude = prelude
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(_Worker(prelude))
+
+    def run(self, r_code, var_name=None, trace=None, background=False):
+        """
+        Run R code on an idle worker; `trace` is the caller's (trace id, span id), if tracing.
+        The requests of `background` calls yield to tool calls at the rate limiter.
+        """
+        worker = self._idle.get()
+        try:
+            worker.conn.send((r_code, var_name, trace))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                    worker.kill()
+                    worker = _Worker(self._prelude)
+                    return {
+                        "type": "error",
+                        "message": f"Execution time exceeded {self.timeout:g} seconds. The process took too long and was terminated."
+                    }
+                message = worker.conn.recv()
+                # The worker's HTTP hooks ask the shared limiter before and report after each request
+                if message[0] == "before_request":
+                    worker.conn.send(self._limiter.before_request(message[1], background))
+                elif message[0] == "after_request":
+                    self._limiter.after_request(message[1], message[2])
+                else:
+                    return message[1]
+        except (EOFError, OSError) as e:
+            worker.kill()
+            worker = _Worker(self._prelude)
+            return {
+                "type": "error",
+                "message": f"R worker exited unexpectedly: {e}"
+            }
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_worker_pool(limiter):
+    """Start the pool on first use, so importing this module never spawns processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.getenv("TM_R_WORKERS", min(4, os.cpu_count() or 1)))
+            timeout = float(os.getenv("TM_R_TIMEOUT", 180))
+            _pool = RWorkerPool(size, limiter, timeout)
+        return _pool
+
+
+if __name__ == "__main__":
+    worker_main(Connection(int(sys.argv[1])))
@@ -0,0 +1,117 @@
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Status codes that mean "slow down"
+THROTTLE_STATUS = re.compile(r"\b(429|503)\b")
+
+
+class TokenBucket:
+    """Token bucket that adapts its refill rate to the server's throttling signals.
+
+    The rate is halved whenever the site answers 429/503 and recovers additively
+    (by a tenth of the configured rate) with every successful request. The buckets
+    live in the server process; R workers ask it before and report after each request.
+
+    Background requests (prefetching) have lower priority: they wait while a tool call is
+    waiting for a token and leave one token of the burst for the next tool call.
+    """
+
+    def __init__(self, rate, burst, min_rate=None):
+        self.base_rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.base_rate / 16
+        self.burst = float(burst)
+        # [current rate, available tokens, last refill (time.monotonic)]
+        self._state = [self.base_rate, self.burst, time.monotonic()]
+        self._lock = threading.Lock()
+        self._waiting = 0  # tool call requests waiting for a token
+
+    @property
+    def rate(self):
+        return self._state[0]
+
+    @property
+    def tokens(self):
+        return self._state[1]
+
+    def _refill(self, now):
+        state = self._state
+        state[1] = min(self.burst, state[1] + (now - state[2]) * state[0])
+        state[2] = now
+
+    def acquire(self, background=False):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        needed = 1 + (1 if background and self.burst >= 2 else 0)
+        waited = 0.0
+        if not background:
+            with self._lock:
+                self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    self._refill(time.monotonic())
+                    if self._state[1] >= needed and not (background and self._waiting):
+                        self._state[1] -= 1
+                        return waited
+                    delay = max((needed - self._state[1]) / self._state[0], 0.05)
+                time.sleep(delay)
+                waited += delay
+        finally:
+            if not background:
+                with self._lock:
+                    self._waiting -= 1
+
+    def throttled(self):
+        with self._lock:
+            self._state[0] = max(self.min_rate, self._state[0] / 2)
+            self._state[1] = 0.0
+            self._state[2] = time.monotonic()
+
+    def succeeded(self):
+        with self._lock:
+            self._state[0] = min(self.base_rate, self._state[0] + self.base_rate / 10)
+
+
+class HostRateLimiter:
+    """One token bucket per configured host. Requests to other hosts are not limited."""
+
+    def __init__(self, hosts, rate, burst):
+        self.buckets = {host: TokenBucket(rate, burst) for host in hosts}
+
+    @classmethod
+    def from_env(cls):
+        hosts = os.getenv("TM_RATE_LIMIT_HOSTS", "transfermarkt.com")
+        return cls(
+            hosts=[host.strip() for host in hosts.split(",") if host.strip()],
+            rate=float(os.getenv("TM_RATE_LIMIT_RATE", 0.5)),
+            burst=float(os.getenv("TM_RATE_LIMIT_BURST", 3)),
+        )
+
+    def bucket_for(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        for name, bucket in self.buckets.items():
+            if host == name or host.endswith("." + name):
+                return bucket
+        return None
+
+    def before_request(self, url, background=False):
+        bucket = self.bucket_for(url)
+        return bucket.acquire(background) if bucket else 0.0
+
+    def after_request(self, url, status):
+        """Feed back the outcome of a request; `status` is a status code or error message."""
+        bucket = self.bucket_for(url)
+        if bucket is None:
+            return
+        if THROTTLE_STATUS.search(str(status)):
+            bucket.throttled()
+        else:
+            bucket.succeeded()
+
+    def stats(self):
+        return {
+            host: {"rate": round(bucket.rate, 3), "tokens": round(bucket.tokens, 2)}
+            for host, bucket in self.buckets.items()
+        }
@@ -0,0 +1,140 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# TTL classes (seconds). None means the entry never expires.
+TTL_PERMANENT = None
+TTL_SEASON = int(os.getenv("TM_CACHE_TTL_SEASON", 6 * 60 * 60))
+TTL_DAILY = int(os.getenv("TM_CACHE_TTL_DAILY", 24 * 60 * 60))
+TTL_VOLATILE = int(os.getenv("TM_CACHE_TTL_VOLATILE", 10 * 60))
+
+
+def current_season_start_year(today=None):
+    """European seasons start in July: before that we are still in last year's season."""
+    today = today or datetime.date.today()
+    return today.year if today.month >= 7 else today.year - 1
+
+
+def season_ttl(start_year):
+    """Completed seasons never change, the running (or a future) season does."""
+    try:
+        start_year = int(start_year)
+    except (TypeError, ValueError):
+        return TTL_DAILY
+    if start_year < current_season_start_year():
+        return TTL_PERMANENT
+    return TTL_SEASON
+
+
+def url_season_ttl(url, default=TTL_DAILY):
+    """Team pages pinned to a season carry `saison_id/<year>` in their URL."""
+    parts = url.rstrip("/").split("/")
+    if "saison_id" in parts:
+        index = parts.index("saison_id")
+        if index + 1 < len(parts):
+            return season_ttl(parts[index + 1])
+    return default
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("http"):
+            return value.rstrip("/")
+        return value.lower()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(r_function, args):
+    """Build a stable cache key from the R function name and its arguments.
+
+    Empty optional arguments are dropped so that `league_url=""` and an omitted
+    league_url hit the same entry.
+    """
+    normalized = {
+        name: _normalize(value)
+        for name, value in args.items()
+        if value is not None and value != ""
+    }
+    return json.dumps([r_function, normalized], sort_keys=True)
+
+
+class ResultCache:
+    """Persistent cache of tool results, backed by a SQLite file."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " r_function TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, r_function, args):
+        """Return the stored result, or None if it is missing, expired or its file is gone."""
+        key = make_key(r_function, args)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            result = None
+            if row is not None:
+                result, expires_at = json.loads(row[0]), row[1]
+                expired = expires_at is not None and expires_at < time.time()
+                if expired or not os.path.exists(result.get("file", "")):
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                    result = None
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def remaining_ttl(self, r_function, args):
+        """Seconds until the entry expires (inf if it never does), None if there is no entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM results WHERE key = ?", (make_key(r_function, args),)
+            ).fetchone()
+        if row is None:
+            return None
+        return float("inf") if row[0] is None else row[0] - time.time()
+
+    def set(self, r_function, args, result, ttl):
+        """Store a successful result. Errors are never cached."""
+        if result.get("type") == "error":
+            return
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, r_function, result, created_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (make_key(r_function, args), r_function, json.dumps(result), now, expires_at),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+        }
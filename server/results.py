@@ -0,0 +1,162 @@
+import os
+import re
+
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# "€15.00m", "€500k", "€1.20bn", "€750Th." as used by Transfermarkt for values and fees
+MONEY_PATTERN = r"^\s*€\s*([\d.,]+)\s*(bn|m|k|th\.)?\s*$"
+MONEY_UNITS = {"bn": 1e9, "m": 1e6, "k": 1e3, "th.": 1e3}
+PROFILE_MAX_CHARS = int(os.getenv("TM_PROFILE_MAX_CHARS", 2000))
+TOP_K = 3
+
+
+def parse_money(series):
+    """Parse Transfermarkt money strings to euros; free transfers are 0, anything else NaN."""
+    text = series.astype("string")
+    parts = text.str.extract(MONEY_PATTERN, flags=re.IGNORECASE)
+    amount = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    euros = amount * parts[1].str.lower().map(MONEY_UNITS).fillna(1).astype(float)
+    return euros.mask(text.str.contains("free transfer", case=False, na=False), 0.0)
+
+
+def _number(value):
+    for unit, scale in (("bn", 1e9), ("m", 1e6), ("k", 1e3)):
+        if abs(value) >= scale:
+            return f"{value / scale:.3g}{unit}"
+    return f"{value:.4g}"
+
+
+def profile(df, max_chars=PROFILE_MAX_CHARS):
+    """
+    Compact profile of a data frame: one line per column with its dtype and null count,
+    min/max/mean for numeric columns (and for money strings such as market values and fees),
+    min/max for dates and the most frequent values of the other columns. Columns that do not
+    fit into `max_chars` are summarized by name only.
+    """
+    nulls = df.isna().sum()
+    numeric = df.select_dtypes("number")
+    stats = numeric.agg(["min", "max", "mean"]) if len(numeric.columns) else None
+    lines = [f"Rows: {len(df)}, Columns: {len(df.columns)}"]
+    size = len(lines[0])
+    for position, column in enumerate(df.columns):
+        series = df[column]
+        line = f"{column} <{series.dtype}> nulls={nulls[column]}"
+        if stats is not None and column in stats.columns:
+            low, high, mean = stats[column]
+            if pd.notna(mean):
+                line += f" min={_number(low)} max={_number(high)} mean={_number(mean)}"
+        elif nulls[column] == len(series):
+            pass
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            line += f" min={series.min():%Y-%m-%d} max={series.max():%Y-%m-%d}"
+        else:
+            non_null = series.dropna()
+            euros = parse_money(non_null) if series.dtype == object else None
+            if euros is not None and len(non_null) and euros.notna().mean() >= 0.5:
+                line += f" euros: min={_number(euros.min())} max={_number(euros.max())} mean={_number(euros.mean())}"
+            counts = non_null.astype(str).value_counts()
+            if len(counts) == len(non_null) and len(non_null) > TOP_K:
+                line += f" unique={len(counts)}"
+            else:
+                top = ", ".join(f"{value[:30]} ({count})" for value, count in counts.head(TOP_K).items())
+                line += f" distinct={len(counts)} top: {top}"
+        if size + len(line) + 1 > max_chars:
+            rest = list(df.columns[position:])
+            lines.append(f"... {len(rest)} more columns: {', '.join(map(str, rest))}"[:max(max_chars - size - 1, 0)])
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def dataframe_summary(df):
+    """Summary fields returned to the client for every data frame result."""
+    return {
+        "profile": profile(df),
+        "shape": str(df.shape),
+        "columns": list(df.columns)
+    }
+
+
+def concat_frames(frames):
+    """
+    Concatenate data frames fetched separately (e.g. one per player), casting columns whose
+    values differ in type between or within frames (a squad number that is "-" for one player
+    and 7 for another) to strings, so that the result can be written to Parquet.
+    """
+    df = pd.concat(frames, ignore_index=True)
+    for column in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[column], skipna=True).startswith("mixed"):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+
+def read_rows(path, offset=0, limit=20, columns=None, sort_by=None, descending=False, max_bytes=16000):
+    """
+    Read a page of a stored result without loading the whole file.
+
+    Parquet files are memory-mapped and only the requested columns (plus `sort_by`) are read;
+    without sorting only the row groups covering the page are touched. The page is rendered
+    as CSV and cut off at `max_bytes` (UTF-8 bytes, header included).
+
+    Returns:
+        dict with the CSV `rows`, the number of rows `returned`, `total_rows`, and
+        `next_offset` (None once the end of the result is reached).
+
+    Raises:
+        ValueError: if `limit` is not positive or the row at `offset` alone exceeds
+            `max_bytes`, since the page could never advance.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    if path.endswith(".parquet"):
+        parquet = pq.ParquetFile(path, memory_map=True)
+        names = parquet.schema_arrow.names
+        columns = list(columns) if columns else names
+        unknown = [c for c in columns + ([sort_by] if sort_by else []) if c not in names]
+        if unknown:
+            raise ValueError(f"Unknown columns {unknown}, available: {names}")
+        total_rows = parquet.metadata.num_rows
+        if sort_by:
+            table = parquet.read(columns=list(dict.fromkeys(columns + [sort_by])))
+            order = pc.sort_indices(table, sort_keys=[(sort_by, "descending" if descending else "ascending")])
+            table = table.take(order[offset:offset + limit])
+        else:
+            groups, skipped, first_row = [], 0, 0
+            for i in range(parquet.num_row_groups):
+                last_row = first_row + parquet.metadata.row_group(i).num_rows
+                if last_row > offset and first_row < offset + limit:
+                    groups.append(i)
+                elif last_row <= offset:
+                    skipped = last_row
+                first_row = last_row
+            table = parquet.read_row_groups(groups, columns=columns).slice(offset - skipped, limit)
+        page = table.select(columns).to_pandas()
+    else:
+        with open(path) as f:
+            values = [line.rstrip("\n") for line in f]
+        if sort_by:
+            values.sort(reverse=descending)
+        total_rows = len(values)
+        page = pd.DataFrame({"value": values[offset:offset + limit]})
+
+    rows, size = [], 0
+    for line in page.to_csv(index=False).splitlines(keepends=True):
+        line_bytes = len(line.encode("utf-8"))
+        if rows and size + line_bytes > max_bytes:
+            break
+        rows.append(line)
+        size += line_bytes
+    returned = max(len(rows) - 1, 0)
+    if returned == 0 and len(page):
+        raise ValueError(f"Row {offset} alone exceeds {max_bytes} bytes; request fewer columns")
+    next_offset = offset + returned
+    return {
+        "rows": "".join(rows),
+        "returned": returned,
+        "total_rows": total_rows,
+        "next_offset": next_offset if next_offset < total_rows else None
+    }
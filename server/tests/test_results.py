@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from results import concat_frames, read_rows
+
+
+@pytest.fixture
+def players(tmp_path):
+    df = pd.DataFrame({
+        "player_name": [f"Müller {i}" if i % 2 else f"Ødegaard {i}" for i in range(50)],
+        "player_age": list(range(50)),
+    })
+    path = str(tmp_path / "players.parquet")
+    # Small row groups so that pages span several of them
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=7)
+    return path, df
+
+
+def page_through(path, **kwargs):
+    pages, offset = [], 0
+    while offset is not None:
+        page = read_rows(path, offset=offset, **kwargs)
+        pages.append(page)
+        offset = page["next_offset"]
+    return pages
+
+
+def test_pages_cover_every_row_once(players):
+    path, df = players
+    pages = page_through(path, limit=8)
+    names = [line.split(",")[0] for page in pages for line in page["rows"].splitlines()[1:]]
+    assert names == list(df["player_name"])
+    assert pages[-1]["next_offset"] is None
+    assert all(page["total_rows"] == 50 for page in pages)
+
+
+def test_sorted_pages(players):
+    path, _ = players
+    page = read_rows(path, offset=5, limit=3, sort_by="player_age", descending=True)
+    ages = [int(line.split(",")[1]) for line in page["rows"].splitlines()[1:]]
+    assert ages == [44, 43, 42]
+    assert page["next_offset"] == 8
+
+
+def test_budget_counts_utf8_bytes(players):
+    path, _ = players
+    page = read_rows(path, limit=50, max_bytes=200)
+    assert len(page["rows"].encode("utf-8")) <= 200
+    assert 0 < page["returned"] < 50
+    assert page["next_offset"] == page["returned"]
+
+
+def test_byte_budget_pages_still_advance(players):
+    path, df = players
+    pages = page_through(path, limit=50, max_bytes=120)
+    assert sum(page["returned"] for page in pages) == len(df)
+    assert all(len(page["rows"].encode("utf-8")) <= 120 for page in pages)
+
+
+def test_row_larger_than_budget_is_an_error(players):
+    path, _ = players
+    with pytest.raises(ValueError, match="exceeds 20 bytes"):
+        read_rows(path, limit=5, max_bytes=20)
+
+
+def test_limit_must_be_positive(players):
+    path, _ = players
+    with pytest.raises(ValueError, match="limit"):
+        read_rows(path, limit=0)
+
+
+def test_offset_past_the_end(players):
+    path, _ = players
+    page = read_rows(path, offset=60, limit=5)
+    assert page["returned"] == 0
+    assert page["next_offset"] is None
+
+
+def test_url_lists(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("".join(f"https://www.transfermarkt.com/p/profil/spieler/{i}\n" for i in range(10)))
+    pages = page_through(str(path), limit=4)
+    assert [page["returned"] for page in pages] == [4, 4, 2]
+    assert read_rows(str(path), limit=1, sort_by="value", descending=True)["rows"].splitlines()[1].endswith("/9")
+
+
+def test_concat_frames_with_mixed_types(tmp_path):
+    frames = [
+        pd.DataFrame({"player_name": ["A", "B"], "squad_number": ["-", 7]}),
+        pd.DataFrame({"player_name": ["C"], "squad_number": [None]}),
+        pd.DataFrame({"player_name": ["D"], "squad_number": [10]}),
+    ]
+    df = concat_frames(frames)
+    df.to_parquet(str(tmp_path / "squad.parquet"), index=False)
+    assert list(df["squad_number"]) == ["-", "7", None, "10"]
+    assert list(df["player_name"]) == ["A", "B", "C", "D"]
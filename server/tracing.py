@@ -0,0 +1,84 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+# (trace id, span id) of the span the current code runs in
+_current = contextvars.ContextVar("tm_current_span", default=None)
+
+
+def current():
+    return _current.get()
+
+
+def format_traceparent(span):
+    """W3C traceparent header value for a (trace id, span id) pair."""
+    return f"00-{span[0]}-{span[1]}-01" if span else None
+
+
+def parse_traceparent(value):
+    """(trace id, span id) from a traceparent value, or None if it is missing or malformed."""
+    parts = str(value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+class Tracer:
+    """Writes spans as JSON lines to `path`; every span call is a no-op when `path` is empty.
+
+    Each line holds trace_id, span_id, parent_id, name, service, start/end (epoch seconds),
+    duration, error and free-form attributes. Several processes may append to the same file.
+    """
+
+    def __init__(self, path, service):
+        self.path = path
+        self.service = service
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, parent=None, **attrs):
+        """
+        Record the enclosed block as a span, child of `parent` (a (trace id, span id) pair) or
+        of the current span. Yields the attribute dict so that the block can add to it.
+        """
+        if not self.path:
+            yield attrs
+            return
+        parent = parent or _current.get()
+        trace_id = parent[0] if parent else uuid.uuid4().hex
+        span_id = uuid.uuid4().hex[:16]
+        token = _current.set((trace_id, span_id))
+        start, error = time.time(), None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            self.record(name, trace_id, span_id, parent[1] if parent else None, start, time.time(), error, attrs)
+
+    def add(self, name, start, end, **attrs):
+        """Record a finished child of the current span, timed by the caller (epoch seconds)."""
+        parent = _current.get()
+        if self.path and parent is not None:
+            self.record(name, parent[0], uuid.uuid4().hex[:16], parent[1], start, end, attrs=attrs)
+
+    def record(self, name, trace_id, span_id, parent_id, start, end, error=None, attrs=None):
+        """Write a span whose start and end were measured elsewhere."""
+        if not self.path:
+            return
+        line = json.dumps({
+            "trace_id": trace_id, "span_id": span_id, "parent_id": parent_id,
+            "name": name, "service": self.service,
+            "start": start, "end": end, "duration": round(end - start, 6),
+            "error": error, "attrs": attrs or {},
+        }, default=str)
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")